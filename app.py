@@ -1,12 +1,13 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file, g
 from flask_mail import Mail, Message
-from flask_caching import Cache
 import json
 import os
 import logging
+import time
 from datetime import datetime, timedelta
 from functools import wraps
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 import traceback
 from dotenv import load_dotenv
 
@@ -18,10 +19,37 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Import custom utilities
 from utils.security import get_security_manager, init_security_system
-from utils.logger import setup_logging, log_request, log_security_event, log_admin_action
+from utils.logger import setup_logging, log_access, log_security_event, log_admin_action
+from utils.generation import get_generation_counter
+from utils.outbox import MailOutbox
+from utils.smtp_pool import get_smtp_pool
+from utils.notifications import DownloadNotifier
+from utils.email_templates import get_email_templates
+from utils.bot_detection import classify_request, classify_user_agent, is_automated, get_traffic_counter
+from utils.metrics import get_metrics, histogram_quantile, DEFAULT_BUCKETS
+from utils.analytics import AccessLogIndexer, is_page_view, sum_counts, top
+from utils.visitor_stats import VisitorCounter
+from utils.download_store import DownloadStore
+from utils.system_metrics import SystemSampler, format_bytes
+from utils.profiling import ProfilingMiddleware, ProfilingSwitch, PROFILE_HEADER, sign_profile_token, profile_summary
+from utils.slow_requests import SlowRequestWatchdog
+from utils.shared_state import RUNTIME_DIR
+from utils.content_store import ContentStore
+from utils.render_cache import RenderCache
+from utils.http_cache import combined_etag, variant_etag, is_not_modified, set_validators
+from utils.compression import available_encodings, negotiate_encoding, compress_response
+from utils.static_assets import send_static_asset, load_asset_manifest
 
-# Initialize Flask app
-app = Flask(__name__)
+# Initialize Flask app (static files are served by serve_static below)
+app = Flask(__name__, static_folder=None)
+
+# Heroku's router is the peer of every request; take the client address from its X-Forwarded-For
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
+# Logical static filename -> content-hashed copy, written by build_assets.py
+asset_manifest = load_asset_manifest(STATIC_DIR)
+fingerprinted_assets = frozenset(asset_manifest.values())
 
 # Load configuration
 def load_settings():
@@ -50,6 +78,10 @@ def load_settings():
 
 settings = load_settings()
 
+# Set by export_static.py, whose pool workers import the app only to render pages: no background
+# services and no per-request logging, metrics or visitor counting
+EXPORT_MODE = os.getenv('PORTFOLIO_EXPORT') == '1'
+
 # Flask configuration
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-key-change-in-production')
 app.config['DEBUG'] = os.getenv('FLASK_ENV') != 'production'
@@ -62,142 +94,326 @@ app.config['MAIL_USE_SSL'] = False  # TLS and SSL are mutually exclusive
 app.config['MAIL_USERNAME'] = os.getenv('GMAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('GMAIL_APP_PASSWORD')
 
-# Cache configuration
-app.config['CACHE_TYPE'] = 'simple'
-app.config['CACHE_DEFAULT_TIMEOUT'] = 300
-
 # Initialize extensions
 mail = Mail(app)
-cache = Cache(app)
 
 # Setup logging
-logger = setup_logging(app)
+logging_settings = settings.get('logging', {})
+logger = setup_logging(
+    app,
+    queue_size=logging_settings.get('queue_size', 10000),
+    overflow_policy=logging_settings.get('overflow_policy', 'drop'),
+    archive_settings=logging_settings.get('archive')
+)
 
 # Initialize security system
 security_manager = get_security_manager()
 
+# Content generations shared by all gunicorn workers
+content_generations = get_generation_counter()
+
+# Parsed data/*.json files, revalidated against the files on disk
+content_store = ContentStore(
+    os.path.join(BASE_DIR, 'data'),
+    content_generations,
+    revalidate_interval_ms=settings.get('cache', {}).get('revalidate_interval_ms', 1000)
+)
+
+# Rendered pages, keyed by the content and template versions they were built from
+page_cache = RenderCache(max_entries=settings.get('cache', {}).get('max_rendered_pages', 32))
+
+# Whenever a worker sees new content for a data file, drop only the pages built from it
+content_store.on_change(page_cache.invalidate)
+
+# Request, cache and mail metrics, merged across workers at scrape time
+metrics = get_metrics()
+metrics.counter('portfolio_http_requests_total', 'HTTP requests by endpoint, method and status class.')
+metrics.histogram('portfolio_http_request_duration_seconds', 'Time from before_request to teardown by endpoint.')
+metrics.counter('portfolio_render_cache_requests_total', 'Cacheable page and API requests by render cache result.')
+metrics.counter('portfolio_contact_messages_total', 'Contact form messages queued for delivery.')
+metrics.counter('portfolio_classified_downloads_total', 'Resume downloads by format and traffic category.')
+metrics.add_collector(lambda: [
+    ('portfolio_classified_downloads_total', {'event': event, 'category': category}, count)
+    for (event, category), count in get_traffic_counter().snapshot().items()
+])
+
+# Incremental rollups of logs/access.log for the admin dashboard
+analytics_settings = settings.get('analytics', {})
+access_indexer = AccessLogIndexer(
+    os.path.join('logs', 'access.log'),
+    os.path.join(RUNTIME_DIR, 'analytics'),
+    retention_days=analytics_settings.get('retention_days', 30),
+    max_paths=analytics_settings.get('max_paths', 500)
+)
+
+# Live views and HyperLogLog unique visitors per (day, path)
+visitor_settings = settings.get('visitor_stats', {})
+visitor_counter = VisitorCounter(
+    os.path.join(RUNTIME_DIR, 'visitors'),
+    precision=visitor_settings.get('precision', 10),
+    retention_days=visitor_settings.get('retention_days', 90)
+)
+
+# Every resume download as a compact event, rolled up by hour, day and month
+download_store_settings = settings.get('download_store', {})
+download_store = DownloadStore(
+    os.path.join(RUNTIME_DIR, 'downloads'),
+    app.config['SECRET_KEY'],
+    hourly_retention_days=download_store_settings.get('hourly_retention_days', 7),
+    daily_retention_days=download_store_settings.get('daily_retention_days', 400),
+    raw_retention_months=download_store_settings.get('raw_retention_months', 12)
+)
+
+# Per-worker RSS, CPU, file descriptor, thread and GC samples, read by the dashboard and /admin/metrics
+system_settings = settings.get('system_metrics', {})
+system_sampler = SystemSampler(os.path.join(RUNTIME_DIR, 'system'), ring_size=system_settings.get('ring_size', 240))
+
+# Stack samples of requests that run past a threshold, written while they are still running
+slow_request_settings = settings.get('slow_requests', {})
+slow_request_watchdog = SlowRequestWatchdog(
+    os.path.join(RUNTIME_DIR, 'slow_requests'),
+    threshold_seconds=slow_request_settings.get('threshold_seconds', 2.0),
+    sample_interval_seconds=slow_request_settings.get('sample_interval_seconds', 0.25),
+    max_samples=slow_request_settings.get('max_samples', 200),
+    report_interval_seconds=slow_request_settings.get('report_interval_seconds', 5),
+    max_reports=slow_request_settings.get('max_reports', 100)
+)
+
+# Sampled or signed-header cProfile dumps, switched on and off at runtime from /admin/profiles
+profiling_settings = settings.get('profiling', {})
+PROFILE_DIR = os.path.join(RUNTIME_DIR, 'profiles')
+profiling_switch = ProfilingSwitch(
+    os.path.join(RUNTIME_DIR, 'profiling.json'),
+    enabled=profiling_settings.get('enabled', False),
+    sample_rate=profiling_settings.get('sample_rate', 0.0)
+)
+app.wsgi_app = ProfilingMiddleware(
+    app.wsgi_app,
+    app.url_map,
+    PROFILE_DIR,
+    app.config['SECRET_KEY'],
+    profiling_switch,
+    max_files_per_endpoint=profiling_settings.get('max_files_per_endpoint', 20)
+)
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """Resolve url_for('static', filename=...) to the fingerprinted copy when one exists"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = asset_manifest.get(values['filename'], values['filename'])
+
 @app.context_processor
 def inject_current_year():
     """Inject current year into all templates"""
     return dict(current_year=datetime.now().year)
 
 def load_json_data(filename):
-    """Load data from JSON file with caching"""
-    @cache.memoize(timeout=300)
-    def _load_data(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.error(f"Data file {file_path} not found")
-            return {}
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON in {file_path}")
-            return {}
-    
-    file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', filename)
-    return _load_data(file_path)
+    """Load data from JSON file through the content store"""
+    return content_store.get(filename)
+
+def template_version(*names):
+    """Return the modification times of the given templates"""
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    return tuple(os.stat(os.path.join(template_dir, name)).st_mtime_ns for name in names)
+
+def page_is_cacheable():
+    """A rendered page can be shared unless it shows per-session content"""
+    return '_flashes' not in session and 'admin_authenticated' not in session
+
+def page_validators(sections, templates):
+    """Return (etag, last_modified) for a page built from the given data files and templates"""
+    entries = [content_store.entry(filename) for filename in sections]
+    template_mtimes = template_version(*templates)
+    etag = combined_etag(*[entry.digest for entry in entries], *template_mtimes, datetime.now().year)
+    last_modified = max([entry.modified for entry in entries] + [mtime / 1e9 for mtime in template_mtimes])
+    return etag, last_modified
+
+def not_modified_response(etag, last_modified=None):
+    """Empty 304 response carrying the current validators"""
+    return set_validators(app.response_class(status=304), etag, last_modified)
+
+def cached_page(sections, templates, render):
+    """Serve a public page from the render cache, answering revalidations with 304"""
+    if not page_is_cacheable():
+        g.cache_status = 'bypass'
+        return render()
+    
+    # Validators come from precomputed content hashes, so a 304 never renders anything
+    etag, last_modified = page_validators(sections, templates)
+    encoding = negotiate_encoding(request, available_encodings())
+    if is_not_modified(request, variant_etag(etag, encoding), last_modified):
+        g.cache_status = 'not_modified'
+        return not_modified_response(variant_etag(etag, encoding), last_modified)
+    
+    # The page only changes when its validators or its URL (canonical link) change; the query
+    # string never reaches the page, so random ?x= values cannot push hot pages out of the LRU
+    page, hit = page_cache.get_or_render((request.base_url, etag), render, depends_on=sections)
+    g.cache_status = 'hit' if hit else 'miss'
+    response = cached_response(page, 'text/html', encoding, etag, last_modified)
+    # Sessions with flashes or an admin login get a different page
+    response.vary.add('Cookie')
+    return response
+
+def cached_response(page, mimetype, encoding, etag, last_modified):
+    """Build a response from a cached page, reusing its cached compressed variant"""
+    if encoding:
+        response = app.response_class(page.encoded(encoding), mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = app.response_class(page.body, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    return set_validators(response, variant_etag(etag, encoding), last_modified)
 
 def save_json_data(filename, data):
-    """Save data to JSON file and clear cache"""
+    """Save data to JSON file and publish it to every worker"""
     try:
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', filename)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        # Clear all cache to ensure fresh data
-        cache.clear()
-        logger.info(f"Successfully saved {filename} and cleared cache")
+        if content_store.save(filename, data):
+            logger.info(f"Successfully saved {filename}")
+        else:
+            logger.info(f"{filename} unchanged, nothing saved")
         return True
     except Exception as e:
         logger.error(f"Error saving {filename}: {str(e)}")
         return False
 
+def deliver_mail(message):
+    """Send a spooled message over the pooled SMTP connection (runs on the outbox worker thread)"""
+    with app.app_context():
+        msg = Message(**message)
+        if app.extensions['mail'].suppress:
+            # Testing / MAIL_SUPPRESS_SEND: let Flask-Mail record it without connecting
+            mail.send(msg)
+            return
+        if msg.has_bad_headers():
+            raise ValueError(f"Refusing to send message with bad headers: {msg.subject}")
+        get_smtp_pool().sendmail(msg.sender, list(msg.send_to), msg.as_bytes())
+
+def queue_mail(msg):
+    """Spool a Flask-Mail message for background delivery instead of sending it inline"""
+    return mail_outbox.enqueue({
+        'subject': msg.subject,
+        'sender': msg.sender,
+        'recipients': msg.recipients,
+        'body': msg.body,
+        'html': msg.html,
+        'reply_to': msg.reply_to
+    })
+
+# Durable mail spool; visitors only pay for an enqueue, SMTP happens in the background
+outbox_settings = settings.get('outbox', {})
+mail_outbox = MailOutbox(
+    os.path.join(RUNTIME_DIR, 'outbox'),
+    deliver_mail,
+    max_attempts=outbox_settings.get('max_attempts', 8),
+    base_retry_seconds=outbox_settings.get('base_retry_seconds', 30),
+    max_retry_seconds=outbox_settings.get('max_retry_seconds', 3600),
+    poll_interval_seconds=outbox_settings.get('poll_interval_seconds', 5)
+)
+
+email_templates = get_email_templates()
+
+def admin_message(subject, template, context):
+    """Build a Flask-Mail message to the admin from a compiled email template"""
+    return Message(
+        subject=subject,
+        sender=app.config['MAIL_USERNAME'],
+        recipients=[os.getenv('ADMIN_EMAIL')],
+        html=email_templates.render(template, **context)
+    )
+
+def queue_contact_message(name, email, subject, message):
+    """Queue the contact form email shared by the regular and AJAX forms"""
+    queue_mail(admin_message(
+        f"Portfolio Contact: {subject}",
+        'contact',
+        {
+            'name': name,
+            'email': email,
+            'subject': subject,
+            'message': message,
+            'sent_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    ))
+    metrics.inc('portfolio_contact_messages_total')
+
 def send_resume_download_notification(format_type, user_ip, user_agent=None):
     """Send email notification when resume is downloaded"""
     try:
         # Get current timestamp
         download_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
         
-        # Create email message
-        msg = Message(
-            subject=f"🎯 Resume Downloaded - {format_type.upper()} Format",
-            sender=app.config['MAIL_USERNAME'],
-            recipients=[os.getenv('ADMIN_EMAIL')]
-        )
-        
         # Get user agent info for better tracking
         browser_info = user_agent or "Unknown Browser"
         
-        # Create detailed email content
-        msg.html = f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px;">
-                📄 Resume Download Alert
-            </h2>
-            
-            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                <h3 style="color: #27ae60; margin-top: 0;">📥 Someone downloaded your resume!</h3>
-                
-                <table style="width: 100%; border-collapse: collapse;">
-                    <tr>
-                        <td style="padding: 8px 0; font-weight: bold; color: #34495e;">📅 Download Time:</td>
-                        <td style="padding: 8px 0; color: #2c3e50;">{download_time}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px 0; font-weight: bold; color: #34495e;">📋 Format:</td>
-                        <td style="padding: 8px 0; color: #2c3e50;">{format_type.upper()} 
-                            {"📄 (PDF)" if format_type == "pdf" else "📝 (Word Document)"}
-                        </td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px 0; font-weight: bold; color: #34495e;">🌐 IP Address:</td>
-                        <td style="padding: 8px 0; color: #2c3e50;">{user_ip}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px 0; font-weight: bold; color: #34495e;">🔍 Browser/Device:</td>
-                        <td style="padding: 8px 0; color: #2c3e50;">{browser_info}</td>
-                    </tr>
-                </table>
-            </div>
-            
-            <div style="background-color: #e8f5e8; padding: 15px; border-radius: 8px; border-left: 4px solid #27ae60;">
-                <h4 style="color: #27ae60; margin-top: 0;">💡 What this means:</h4>
-                <ul style="color: #2c3e50; margin-bottom: 0;">
-                    <li>A potential employer or recruiter viewed your portfolio</li>
-                    <li>They were interested enough to download your resume</li>
-                    <li>This could lead to interview opportunities!</li>
-                </ul>
-            </div>
-            
-            <div style="background-color: #fff3cd; padding: 15px; border-radius: 8px; border-left: 4px solid #ffc107; margin-top: 15px;">
-                <h4 style="color: #856404; margin-top: 0;">📊 Portfolio Analytics:</h4>
-                <p style="color: #856404; margin-bottom: 0;">
-                    <strong>Portfolio URL:</strong> 
-                    <a href="https://mahanth-portfolio-51b2beb98cbe.herokuapp.com/" style="color: #0066cc;">
-                        https://mahanth-portfolio-51b2beb98cbe.herokuapp.com/
-                    </a>
-                </p>
-            </div>
-            
-            <div style="text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #dee2e6;">
-                <p style="color: #6c757d; font-size: 0.9em; margin: 0;">
-                    This is an automated notification from your portfolio website.<br>
-                    Generated at {download_time}
-                </p>
-            </div>
-        </div>
-        """
-        
-        # Send the email
-        mail.send(msg)
-        logger.info(f"Resume download notification sent for {format_type} download from {user_ip}")
+        msg = admin_message(
+            f"🎯 Resume Downloaded - {format_type.upper()} Format",
+            'resume_download',
+            {
+                'download_time': download_time,
+                'format_type': format_type,
+                'user_ip': user_ip,
+                'browser_info': browser_info
+            }
+        )
+        
+        # Queue the email for background delivery
+        queue_mail(msg)
+        logger.info(f"Resume download notification queued for {format_type} download from {user_ip}")
         return True
         
     except Exception as e:
         logger.error(f"Failed to send resume download notification: {str(e)}")
         return False
 
+def send_resume_download_digest(rows):
+    """Queue one email summarising buffered resume downloads"""
+    try:
+        # Digests are usually flushed from the notifier's background thread
+        with app.app_context():
+            return _queue_resume_download_digest(rows)
+    except Exception as e:
+        logger.error(f"Failed to queue resume download digest: {str(e)}")
+        return False
+
+def _queue_resume_download_digest(rows):
+    """Build and queue the digest email (needs an app context)"""
+    total = sum(row['count'] for row in rows)
+    msg = admin_message(
+        f"📊 Resume Download Digest - {total} download{'s' if total != 1 else ''}",
+        'resume_digest',
+        {'total': total, 'rows': rows}
+    )
+    
+    queue_mail(msg)
+    return True
+
+# Coalesces download notifications into digests (first download of the day is still sent at once)
+download_settings = settings.get('notifications', {}).get('resume_download', {})
+download_notifier = DownloadNotifier(
+    os.path.join(RUNTIME_DIR, 'notifications'),
+    send_immediate=lambda event: send_resume_download_notification(event['format'], event['ip'], event['ua']),
+    send_digest=send_resume_download_digest,
+    mode=download_settings.get('mode', 'digest'),
+    dedupe_window_seconds=download_settings.get('dedupe_window_minutes', 30) * 60,
+    flush_interval_seconds=download_settings.get('flush_interval_minutes', 60) * 60,
+    flush_max_events=download_settings.get('flush_max_events', 20),
+    immediate_first_of_day=download_settings.get('immediate_first_of_day', True)
+)
+
+def start_background_services():
+    """Start the worker's spooling, sampling and publishing threads"""
+    metrics.start(settings.get('metrics', {}).get('flush_interval_seconds', 5))
+    access_indexer.start(analytics_settings.get('index_interval_seconds', 60))
+    visitor_counter.start(visitor_settings.get('flush_interval_seconds', 10))
+    download_store.start(download_store_settings.get('flush_interval_seconds', 10))
+    system_sampler.start(system_settings.get('sample_interval_seconds', 15))
+    slow_request_watchdog.start()
+    mail_outbox.start()
+    download_notifier.start()
+
+if not EXPORT_MODE:
+    start_background_services()
+
 def admin_required(f):
     """Decorator to require admin authentication"""
     @wraps(f)
@@ -227,8 +443,10 @@ def admin_required(f):
 @app.before_request
 def before_request():
     """Handle URL canonicalization and redirects"""
-    # Log all requests
-    log_request(request)
+    if not EXPORT_MODE:
+        # Timed for the access log written at teardown
+        g.request_started = time.monotonic()
+        slow_request_watchdog.begin(request.endpoint, request.method, request.path)
     
     # Force HTTPS in production (if not localhost)
     if not app.debug and not request.is_secure and request.headers.get('Host', '').split(':')[0] not in ['localhost', '127.0.0.1']:
@@ -255,8 +473,6 @@ def before_request():
 @app.after_request
 def after_request(response):
     """Add SEO and security headers"""
-    log_request(request, response.status_code)
-    
     # SEO and Security Headers
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
@@ -265,12 +481,65 @@ def after_request(response):
     
     # Cache control for static assets
     if request.path.startswith('/static/'):
-        response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 year
+        if request.path[len('/static/'):] in fingerprinted_assets:
+            # The URL changes whenever the content does
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'  # 1 year
+        else:
+            response.headers['Cache-Control'] = 'public, max-age=300'  # 5 minutes
     elif request.path in ['/', '/portfolio']:
         response.headers['Cache-Control'] = 'public, max-age=3600'  # 1 hour
     
+    # Compress HTML/JSON that did not come pre-compressed from the page cache
+    compression = settings.get('compression', {})
+    response = compress_response(
+        response, request,
+        min_size=compression.get('min_size_bytes', 512),
+        gzip_level=compression.get('gzip_level', 6),
+        brotli_quality=compression.get('brotli_quality', 5)
+    )
+    
+    # Remembered for the access log record written at teardown
+    g.response_status = response.status_code
+    g.response_size = response.content_length
     return response
 
+@app.teardown_request
+def teardown_request(error=None):
+    """Write one structured access log record per request"""
+    started = g.get('request_started')
+    if started is None:
+        # Export renders and requests that failed before before_request ran
+        return
+    slow_request_watchdog.end()
+    try:
+        log_access({
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'ip': request.remote_addr,
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': 500 if error is not None else g.get('response_status', 500),
+            'bytes': g.get('response_size'),
+            'duration_ms': round((time.monotonic() - started) * 1000, 2),
+            'cache': g.get('cache_status'),
+            'ua': request.headers.get('User-Agent', 'Unknown'),
+            'referrer': request.referrer
+        }, settings.get('access_log', {}).get('sample_rates'))
+    except Exception as e:
+        logger.error(f"Failed to write access log record: {str(e)}")
+    
+    endpoint = request.endpoint or 'unmatched'
+    status = 500 if error is not None else g.get('response_status', 500)
+    metrics.inc('portfolio_http_requests_total', endpoint=endpoint, method=request.method, status=f"{status // 100}xx")
+    metrics.observe('portfolio_http_request_duration_seconds', time.monotonic() - started, endpoint=endpoint)
+    if g.get('cache_status'):
+        metrics.inc('portfolio_render_cache_requests_total', result=g.cache_status)
+    
+    user_agent = request.headers.get('User-Agent', '')
+    if is_page_view(request.method, request.endpoint, status) and not is_automated(classify_user_agent(user_agent)):
+        # Only a hash of IP and browser goes into the sketch, never the IP itself
+        visitor_counter.record(request.path, f"{request.remote_addr}|{user_agent}")
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -281,10 +550,21 @@ def internal_error(error):
     logger.error(f"Internal server error: {str(error)}")
     return render_template('errors/500.html'), 500
 
+@app.route('/static/<path:filename>', endpoint='static')
+def serve_static(filename):
+    """Serve static assets, using build_assets.py's precompressed variants when accepted"""
+    return send_static_asset(STATIC_DIR, filename, request)
+
 # Main routes
+HOME_SECTIONS = ('home.json', 'about.json', 'experience.json')
+
 @app.route('/')
 def home():
     """Single page portfolio with all sections"""
+    return cached_page(HOME_SECTIONS, ('single_page.html', 'base.html'), render_home)
+
+def render_home():
+    """Render single_page.html from the current section data"""
     home_data = load_json_data('home.json')
     about_data = load_json_data('about.json')
     experience_data = load_json_data('experience.json')
@@ -303,14 +583,14 @@ def home_separate():
 @app.route('/about')
 def about():
     """About page"""
-    data = load_json_data('about.json')
-    return render_template('about.html', data=data)
+    return cached_page(('about.json',), ('about.html', 'base.html'),
+                       lambda: render_template('about.html', data=load_json_data('about.json')))
 
 @app.route('/experience')
 def experience():
     """Experience page"""
-    data = load_json_data('experience.json')
-    return render_template('experience.html', data=data)
+    return cached_page(('experience.json',), ('experience.html', 'base.html'),
+                       lambda: render_template('experience.html', data=load_json_data('experience.json')))
 
 @app.route('/resume')
 def resume():
@@ -338,12 +618,27 @@ def download_resume(format):
     
     try:
         if os.path.exists(resume_path):
+            # The visitor's own address (ProxyFix resolves it behind the Heroku router), so
+            # the notifier's (IP, UA, format) dedupe never merges different people
+            client_ip = request.remote_addr
+            
+            # Crawlers and link unfurlers get the file but no admin log entry or email
+            category = classify_request(request)
+            get_traffic_counter().increment(f"resume_download_{format}", category)
+            try:
+                download_store.record(format, client_ip, category)
+            except Exception as e:
+                logger.error(f"Failed to record resume download: {str(e)}")
+            if is_automated(category):
+                logger.info(f"Automated resume download ({format}, {category}) - IP: {client_ip}")
+                return send_file(resume_path, as_attachment=True, download_name=filename, mimetype=mimetype)
+            
             # Log the download action
-            log_admin_action(f"Resume downloaded ({format})", request.remote_addr)
+            log_admin_action(f"Resume downloaded ({format})", client_ip)
             
-            # Send email notification to admin
+            # Notify the admin (deduplicated and batched into digests)
             user_agent = request.headers.get('User-Agent', 'Unknown Browser')
-            send_resume_download_notification(format, request.remote_addr, user_agent)
+            download_notifier.record(format, client_ip, user_agent)
             
             # Serve the file
             return send_file(resume_path, as_attachment=True, download_name=filename, mimetype=mimetype)
@@ -399,7 +694,7 @@ def test_resume_notification():
         if success:
             return jsonify({
                 'status': 'success',
-                'message': 'Test notification sent successfully!',
+                'message': 'Test notification queued successfully!',
                 'sent_to': os.getenv('ADMIN_EMAIL'),
                 'timestamp': datetime.now().isoformat()
             })
@@ -418,7 +713,7 @@ def test_resume_notification():
 @app.route('/robots.txt')
 def robots_txt():
     """Serve robots.txt for SEO"""
-    return send_file('static/robots.txt', mimetype='text/plain')
+    return send_static_asset(STATIC_DIR, 'robots.txt', request)
 
 @app.route('/sitemap.xml')
 def sitemap_xml():
@@ -470,31 +765,14 @@ def contact():
             
             # Send email
             try:
-                msg = Message(
-                    subject=f"Portfolio Contact: {subject}",
-                    sender=app.config['MAIL_USERNAME'],
-                    recipients=[os.getenv('ADMIN_EMAIL')]
-                )
-                
-                msg.html = f"""
-                <h3>New Contact Form Submission</h3>
-                <p><strong>Name:</strong> {name}</p>
-                <p><strong>Email:</strong> {email}</p>
-                <p><strong>Subject:</strong> {subject}</p>
-                <p><strong>Message:</strong></p>
-                <p>{message.replace(chr(10), '<br>')}</p>
-                <hr>
-                <p><em>Sent from your portfolio website at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</em></p>
-                """
-                
-                mail.send(msg)
+                queue_contact_message(name, email, subject, message)
                 
                 logger.info(f"Contact form submitted by {email}")
                 flash(settings['contact_form']['success_message'], 'success')
                 return redirect(url_for('contact'))
                 
             except Exception as e:
-                logger.error(f"Error sending contact email: {str(e)}")
+                logger.error(f"Error queueing contact email: {str(e)}")
                 flash(settings['contact_form']['error_message'], 'error')
                 return render_template('contact.html')
                 
@@ -533,37 +811,30 @@ def contact_ajax():
         
         # Send email
         try:
-            msg = Message(
-                subject=f"Portfolio Contact: {subject}",
-                sender=app.config['MAIL_USERNAME'],
-                recipients=[os.getenv('ADMIN_EMAIL')]
-            )
-            
-            msg.html = f"""
-            <h3>New Contact Form Submission</h3>
-            <p><strong>Name:</strong> {name}</p>
-            <p><strong>Email:</strong> {email}</p>
-            <p><strong>Subject:</strong> {subject}</p>
-            <p><strong>Message:</strong></p>
-            <p>{message.replace(chr(10), '<br>')}</p>
-            <hr>
-            <p><em>Sent from your portfolio website at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</em></p>
-            """
-            
-            mail.send(msg)
+            queue_contact_message(name, email, subject, message)
             
             logger.info(f"Contact form submitted by {email} via AJAX")
+            # The message is spooled either way; only the wording changes while the mail server is down
+            if get_smtp_pool().breaker.state == 'open':
+                logger.warning("Contact message queued while the SMTP circuit is open")
+                message_text = 'Thank you for your message! Email delivery is delayed right now, but your message is queued and will be delivered shortly.'
+            else:
+                message_text = 'Thank you for your message! I\'ll get back to you soon.'
             return jsonify({
                 'success': True,
-                'message': 'Thank you for your message! I\'ll get back to you soon.'
+                'status': 'queued',
+                'message': message_text
             })
             
         except Exception as e:
-            logger.error(f"Error sending contact email via AJAX: {str(e)}")
-            return jsonify({
+            logger.error(f"Error queueing contact email via AJAX: {str(e)}")
+            response = jsonify({
                 'success': False,
+                'status': 'try_later',
                 'message': 'There was an error sending your message. Please try again later.'
-            }), 500
+            })
+            response.headers['Retry-After'] = '60'
+            return response, 503
             
     except Exception as e:
         logger.error(f"Error processing contact form via AJAX: {str(e)}")
@@ -572,18 +843,193 @@ def contact_ajax():
             'message': 'An unexpected error occurred. Please try again.'
         }), 500
 
+def render_cache_hit_ratio(counters):
+    """Share of cacheable renders served from the render cache, or None before the first one"""
+    cache = {dict(labels)['result']: value for (name, labels), value in counters.items()
+             if name == 'portfolio_render_cache_requests_total'}
+    served = cache.get('hit', 0) + cache.get('miss', 0)
+    return cache.get('hit', 0) / served if served else None
+
+def performance_summary(counters, histograms):
+    """Latency percentiles, cache hit ratio and mail health for the dashboard"""
+    latency = [0] * (len(DEFAULT_BUCKETS) + 2)
+    for (name, _), counts in histograms.items():
+        if name == 'portfolio_http_request_duration_seconds':
+            latency = [a + b for a, b in zip(latency, counts)]
+    hit_ratio = render_cache_hit_ratio(counters)
+    p50 = histogram_quantile(0.5, DEFAULT_BUCKETS, latency)
+    p95 = histogram_quantile(0.95, DEFAULT_BUCKETS, latency)
+    return {
+        'requests': sum(latency[:-1]),
+        'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+        'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        'cache_hit_ratio': round(hit_ratio * 100, 1) if hit_ratio is not None else None,
+        'mail_queue_depth': mail_outbox.depth(),
+        'smtp_circuit': get_smtp_pool().breaker.state
+    }
+
+def traffic_summary(rollups):
+    """Last day's page views and status mix, last week's top pages and referrers, from the access log rollups"""
+    now = datetime.now()
+    since = (now - timedelta(hours=24)).strftime('%Y-%m-%dT%H')
+    recent = [bucket for hour, bucket in rollups['hours'].items() if hour >= since]
+    week_since = (now - timedelta(days=6)).strftime('%Y-%m-%d')
+    week = [daily for day, daily in rollups.get('days', {}).items() if day >= week_since]
+    return {
+        'page_views_24h': round(sum(bucket['page_views'] for bucket in recent)),
+        'bot_requests_24h': round(sum(bucket['bots'] for bucket in recent)),
+        'top_paths_7d': top(sum_counts(week, 'paths')),
+        'top_referrers_7d': top(sum_counts(week, 'referrers'), exclude=(request.host,)),
+        'status_mix_24h': top(sum_counts(recent, 'status'), limit=None),
+        'updated_at': datetime.fromtimestamp(rollups['updated_at']).strftime('%H:%M') if rollups['updated_at'] else None
+    }
+
+def download_summary():
+    """Resume downloads over the last day, week and month from the download rollups"""
+    now = datetime.now()
+    windows = (
+        ('24h', now - timedelta(hours=23), 'hour'),
+        ('7d', now - timedelta(days=6), 'day'),
+        ('30d', now - timedelta(days=29), 'day')
+    )
+    return {label: download_store.totals(start, now, resolution) for label, start, resolution in windows}
+
+@app.route('/admin/api/downloads')
+@admin_required
+def admin_api_downloads():
+    """Resume download buckets for a range: ?resolution=hour|day|month&periods=N"""
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in ('hour', 'day', 'month'):
+        return jsonify({'error': 'resolution must be hour, day or month'}), 400
+    periods = min(max(request.args.get('periods', 30, type=int), 1), 400)
+    end = datetime.now()
+    if resolution == 'hour':
+        start = end - timedelta(hours=periods - 1)
+    elif resolution == 'day':
+        start = end - timedelta(days=periods - 1)
+    else:
+        index = end.year * 12 + end.month - periods
+        start = end.replace(year=index // 12, month=index % 12 + 1, day=1)
+    return jsonify({
+        'resolution': resolution,
+        'buckets': download_store.query(start, end, resolution),
+        'summary': download_summary()
+    })
+
+def system_summary(workers):
+    """Latest sample and memory growth of each worker for the dashboard"""
+    return [{
+        'pid': worker['pid'],
+        'rss': format_bytes(worker['latest']['rss_bytes']),
+        'rss_growth': format_bytes(worker['rss_growth_bytes']),
+        'window_minutes': round((worker['latest']['ts'] - worker['samples'][0]['ts']) / 60),
+        'cpu_percent': worker['latest']['cpu_percent'],
+        'open_fds': worker['latest']['open_fds'],
+        'threads': worker['latest']['threads'],
+        'gc_objects': f"{worker['latest']['gc_objects']:,}",
+        'gc_collections': '/'.join(str(count) for count in worker['latest']['gc_collections'])
+    } for worker in workers]
+
+def worker_gauges(workers):
+    """Per-worker gauges for /admin/metrics from the latest published samples"""
+    gauges = (
+        ('portfolio_worker_rss_bytes', 'Resident set size of each worker.', 'rss_bytes'),
+        ('portfolio_worker_cpu_percent', 'CPU use of each worker since its previous sample.', 'cpu_percent'),
+        ('portfolio_worker_open_fds', 'Open file descriptors of each worker.', 'open_fds'),
+        ('portfolio_worker_threads', 'Threads in each worker.', 'threads'),
+        ('portfolio_worker_gc_objects', 'Objects tracked by the garbage collector in each worker.', 'gc_objects')
+    )
+    return [
+        (name, help_text, [({'pid': worker['pid']}, worker['latest'][field])
+                           for worker in workers if worker['latest'][field] is not None])
+        for name, help_text, field in gauges
+    ]
+
+@app.route('/admin/api/stats')
+@admin_required
+def admin_api_stats():
+    """Live views and unique visitors, polled by the dashboard"""
+    days = min(max(request.args.get('days', 7, type=int), 1), visitor_counter.retention_days)
+    return jsonify(visitor_counter.stats(days=days))
+
+@app.route('/admin/api/slow-requests')
+@admin_required
+def admin_api_slow_requests():
+    """Recent slow request reports with their stack histograms"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    return jsonify({
+        'threshold_seconds': slow_request_watchdog.threshold_seconds,
+        'reports': slow_request_watchdog.recent(limit)
+    })
+
+@app.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    """Prometheus text exposition of metrics merged across workers"""
+    collected = metrics.collect()
+    counters, _ = collected
+    body = metrics.render(collected=collected, gauges=(
+        ('portfolio_mail_outbox_depth', 'Messages waiting in the mail outbox.', mail_outbox.depth()),
+        ('portfolio_smtp_circuit_open', 'Whether the scraped worker\'s SMTP circuit breaker is open.',
+         1 if get_smtp_pool().breaker.state == 'open' else 0),
+        ('portfolio_render_cache_hit_ratio', 'Share of cacheable renders served from the render cache.',
+         round(render_cache_hit_ratio(counters) or 0, 4)),
+        ('portfolio_render_cache_entries', 'Rendered pages held by the scraped worker.', len(page_cache)),
+        *worker_gauges(system_sampler.workers())
+    ))
+    return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiles', methods=['GET', 'POST'])
+@admin_required
+def admin_profiles():
+    """Top cumulative functions across stored request profiles, and the profiling switch"""
+    if request.method == 'POST':
+        enabled = request.form.get('action') == 'enable'
+        try:
+            sample_rate = float(request.form.get('sample_rate_percent', 0)) / 100
+        except ValueError:
+            flash('Sample rate must be a number.', 'error')
+            return redirect(url_for('admin_profiles'))
+        profiling_switch.set(enabled, sample_rate)
+        log_admin_action(f"Request profiling {'enabled' if enabled else 'disabled'} "
+                         f"(sample rate {profiling_switch.state()[1]:.2%})", request.remote_addr)
+        return redirect(url_for('admin_profiles'))
+    
+    endpoint = request.args.get('route') or None
+    summary = profile_summary(PROFILE_DIR, endpoint=endpoint, limit=profiling_settings.get('top_functions', 30))
+    enabled, sample_rate = profiling_switch.state()
+    return render_template(
+        'admin/profiles.html',
+        summary=summary,
+        endpoint=endpoint,
+        enabled=enabled,
+        sample_rate=sample_rate,
+        profile_header=PROFILE_HEADER,
+        profile_token=sign_profile_token(app.config['SECRET_KEY']) if enabled else None
+    )
+
 # Admin routes
 @app.route('/admin')
 @admin_required
 def admin_dashboard():
     """Admin dashboard"""
-    # Mock statistics for dashboard
+    counters, histograms = metrics.collect()
+    rollups = access_indexer.rollups()
+    visitors = visitor_counter.stats()
+    contact_messages = sum(value for (name, _), value in counters.items() if name == 'portfolio_contact_messages_total')
+    entries = [content_store.entry(filename) for filename in HOME_SECTIONS]
+    
     stats = {
-        'page_views': '1,234',
-        'contact_messages': '12',
-        'projects': '8',
-        'last_updated': 'Today'
+        'page_views': f"{visitors['window']['views']:,}",
+        'unique_visitors': f"{visitors['window']['visitors']:,}",
+        'contact_messages': f"{contact_messages:,}",
+        'projects': str(len(load_json_data('experience.json').get('projects', []))),
+        'last_updated': datetime.fromtimestamp(max(entry.modified for entry in entries)).strftime('%b %d, %Y')
     }
+    performance = performance_summary(counters, histograms)
+    traffic = traffic_summary(rollups)
+    downloads = download_summary()
+    workers = system_summary(system_sampler.workers())
     
     # System information
     import sys
@@ -592,7 +1038,8 @@ def admin_dashboard():
         'python_version': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
     }
     
-    return render_template('admin/dashboard.html', stats=stats, **system_info)
+    return render_template('admin/dashboard.html', stats=stats, performance=performance, traffic=traffic,
+                           downloads=downloads, workers=workers, **system_info)
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -657,19 +1104,10 @@ def admin_save_section(section):
         
         logger.info(f"Attempting to save {section} content: {data}")
         
-        # Save the file
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', f'{section}.json')
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        # Saving unchanged content is a no-op: no write and no cache eviction
+        if not save_json_data(f'{section}.json', data):
+            return jsonify({'success': False, 'message': 'Failed to save content'})
         
-        # Clear all cache
-        cache.clear()
-        
-        # Verify the save worked
-        with open(file_path, 'r') as f:
-            saved_data = json.load(f)
-        
-        logger.info(f"Successfully saved and verified {section} content")
         log_admin_action(f"Updated {section} content", request.remote_addr)
         return jsonify({'success': True, 'message': 'Content saved successfully'})
         
@@ -818,8 +1256,29 @@ def api_get_data(section):
     if section not in valid_sections:
         return jsonify({'error': 'Invalid section'}), 400
     
-    data = load_json_data(f'{section}.json')
-    return jsonify(data)
+    filename = f'{section}.json'
+    entry = content_store.entry(filename)
+    etag = entry.digest[:32]
+    encoding = negotiate_encoding(request, available_encodings())
+    if is_not_modified(request, variant_etag(etag, encoding), entry.modified):
+        g.cache_status = 'not_modified'
+        return not_modified_response(variant_etag(etag, encoding), entry.modified)
+    
+    # Serialize once per content version instead of running jsonify on every call
+    page, hit = page_cache.get_or_render(('api', section, etag),
+                                         lambda: jsonify(load_json_data(filename)).get_data(),
+                                         depends_on=(filename,))
+    g.cache_status = 'hit' if hit else 'miss'
+    return cached_response(page, app.json.mimetype, encoding, etag, entry.modified)
+
+@app.route('/admin/api/mail-status')
+@admin_required
+def admin_mail_status():
+    """SMTP circuit breaker state and outbox depth"""
+    return jsonify({
+        'circuit_breaker': get_smtp_pool().breaker.snapshot(),
+        'outbox_depth': mail_outbox.depth()
+    })
 
 # Backup and Restore routes
 @app.route('/admin/backup')
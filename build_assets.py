@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Static asset build script for portfolio website
+Writes content-hashed copies of CSS/JS plus a manifest, then gzip and brotli
+variants of text assets so nothing is compressed at request time
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.compression import SUFFIXES, COMPRESSIBLE_EXTENSIONS, BROTLI_AVAILABLE, available_encodings, compress
+from utils.shared_state import atomic_write
+from utils.static_assets import MANIFEST_NAME, FINGERPRINT_EXTENSIONS, FINGERPRINT_EXCLUDE, FINGERPRINTED_NAME
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+def is_stale(source, target):
+    """True if target is missing or older than source"""
+    try:
+        return os.stat(target).st_mtime_ns < os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+def fingerprinted_name(filename, data):
+    """style.css -> style.<hash>.css"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+def fingerprint_assets(static_dir=STATIC_DIR):
+    """Write content-hashed copies of CSS/JS and the manifest that maps logical names to them"""
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        for file in files:
+            logical = os.path.relpath(os.path.join(root, file), static_dir).replace(os.sep, '/')
+            if (not file.endswith(FINGERPRINT_EXTENSIONS) or logical in FINGERPRINT_EXCLUDE
+                    or FINGERPRINTED_NAME.search(file)):
+                continue
+
+            with open(os.path.join(root, file), 'rb') as f:
+                data = f.read()
+            hashed = fingerprinted_name(logical, data)
+            target = os.path.join(static_dir, hashed)
+            if os.path.exists(target):
+                # Same content as an earlier build; keep it newer than its source
+                os.utime(target)
+            else:
+                atomic_write(target, data)
+                print(f"✅ {logical} → {hashed}")
+            manifest[logical] = hashed
+
+    # Drop fingerprinted copies left over from older builds
+    current = set(manifest.values())
+    for root, dirs, files in os.walk(static_dir):
+        for file in files:
+            name = os.path.relpath(os.path.join(root, file), static_dir).replace(os.sep, '/')
+            if FINGERPRINTED_NAME.search(file) and name not in current:
+                os.remove(os.path.join(root, file))
+                print(f"🗑️  Removed stale {name}")
+
+    atomic_write(os.path.join(static_dir, MANIFEST_NAME),
+                 json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def compress_assets(static_dir=STATIC_DIR, force=False):
+    """Write precompressed variants next to every compressible asset"""
+    written = 0
+    for root, dirs, files in os.walk(static_dir):
+        for file in files:
+            if not file.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+
+            source = os.path.join(root, file)
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            for encoding in available_encodings():
+                target = source + SUFFIXES[encoding]
+                if not force and not is_stale(source, target):
+                    continue
+                compressed = compress(data, encoding)
+                atomic_write(target, compressed)
+                written += 1
+                print(f"✅ {os.path.relpath(target, static_dir)}: {len(data):,} → {len(compressed):,} bytes")
+    return written
+
+def main():
+    force = '--force' in sys.argv
+
+    if not BROTLI_AVAILABLE:
+        print("Brotli not available, writing gzip variants only. Install with: pip install Brotli")
+
+    manifest = fingerprint_assets()
+    print(f"\n📋 Fingerprinted {len(manifest)} assets\n")
+
+    written = compress_assets(force=force)
+    print(f"\n🎉 Wrote {written} precompressed files")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Portfolio Static Site Exporter
+Pre-renders every public route so the public site can be served by nginx or a CDN
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.compression import SUFFIXES, available_encodings, compress
+from utils.shared_state import atomic_write
+
+DEFAULT_BASE_URL = 'https://mahanth-portfolio-51b2beb98cbe.herokuapp.com'
+
+PUBLIC_ROUTES = [
+    '/',
+    '/about',
+    '/experience',
+    '/resume',
+    '/contact',
+    '/sitemap.xml',
+    '/robots.txt',
+    '/api/data/home',
+    '/api/data/about',
+    '/api/data/experience',
+]
+
+# File extension for extensionless routes, by response mimetype
+EXTENSIONS = {
+    'text/html': '.html',
+    'application/json': '.json',
+}
+
+# Flask test client of the app, created once per pool worker
+_client = None
+
+def _init_worker():
+    """Import the Flask app once in each pool worker, without its background services"""
+    global _client
+    os.environ['PORTFOLIO_EXPORT'] = '1'
+    from app import app
+    _client = app.test_client()
+
+def output_name(path, mimetype):
+    """Map a route to the file it is exported as"""
+    if path == '/':
+        return 'index.html'
+    name = path.lstrip('/')
+    if not os.path.splitext(name)[1]:
+        name += EXTENSIONS.get(mimetype, '')
+    return name
+
+def export_route(path, output_dir, base_url):
+    """Render one route and write it with its precompressed siblings"""
+    try:
+        response = _client.get(path, base_url=base_url)
+    except Exception as e:
+        # Exceptions from the app may not be picklable, so send back their text only
+        raise RuntimeError(f"{type(e).__name__}: {str(e)}") from None
+    if response.status_code != 200:
+        return path, response.status_code, []
+
+    body = response.get_data()
+    target = os.path.join(output_dir, output_name(path, response.mimetype))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    atomic_write(target, body)
+    written = [target]
+
+    for encoding in available_encodings():
+        compressed_path = target + SUFFIXES[encoding]
+        atomic_write(compressed_path, compress(body, encoding))
+        written.append(compressed_path)
+
+    return path, response.status_code, written
+
+class StaticExporter:
+    def __init__(self, output_dir, base_url=DEFAULT_BASE_URL, workers=None):
+        self.output_dir = os.path.abspath(output_dir)
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def export(self, routes=PUBLIC_ROUTES):
+        """Render routes across a process pool, returning {route: status}"""
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(export_route, path, self.output_dir, self.base_url): path
+                for path in routes
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    _, status, written = future.result()
+                except Exception as e:
+                    self.logger.error(f"Failed to export {path}: {str(e)}")
+                    results[path] = None
+                    continue
+
+                results[path] = status
+                if status == 200:
+                    self.logger.info(f"Exported {path} ({len(written)} files)")
+                else:
+                    self.logger.error(f"Failed to export {path}: HTTP {status}")
+        return results
+
+    def copy_static_assets(self):
+        """Copy static/ next to the rendered pages so the export is self-contained"""
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+        shutil.copytree(source, os.path.join(self.output_dir, 'static'), dirs_exist_ok=True)
+        self.logger.info("Copied static assets")
+
+def main():
+    parser = argparse.ArgumentParser(description='Portfolio Static Site Exporter')
+    parser.add_argument('--output', '-o', default='static_site',
+                       help='Output directory (default: static_site)')
+    parser.add_argument('--base-url', '-b', default=DEFAULT_BASE_URL,
+                       help='Public URL the site will be served from')
+    parser.add_argument('--workers', '-w', type=int,
+                       help='Number of render processes (default: CPU count)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    exporter = StaticExporter(args.output, args.base_url, args.workers)
+    results = exporter.export()
+    exporter.copy_static_assets()
+
+    failed = [path for path, status in results.items() if status != 200]
+    print(f"✅ Exported {len(results) - len(failed)} routes to {exporter.output_dir}")
+    if failed:
+        print(f"❌ Failed routes: {', '.join(sorted(failed))}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
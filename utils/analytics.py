@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from utils.bot_detection import classify_user_agent, is_automated
+from utils.logger import log_segments, open_log_segment
+from utils.shared_state import atomic_write, file_lock
+
+# Endpoints that render a page a visitor reads; files, feeds, downloads and debug routes are not views
+PAGE_ENDPOINTS = frozenset({'home', 'about', 'experience', 'resume', 'contact'})
+
+class AccessLogIndexer:
+    """Rolls the JSON access log up into small per-hour and per-day counters.
+
+    Request, page view, bot and status counts are kept per hour; page views
+    by path and referrer per day, so every figure can be summed over the same
+    window as the others and old traffic ages out with retention_days.
+
+    Each run parses only the bytes appended since the last one. The state file
+    remembers the inode and offset of the live log; when the log has been
+    rotated since, the segments after the last one fully indexed are read
+    first (the first of them from the saved offset, even once it is gzipped),
+    then the new live file from the start. Runs hold a lock, so two workers
+    never index the same bytes.
+    """
+
+    def __init__(self, log_path, state_dir, retention_days=30, max_paths=500):
+        os.makedirs(state_dir, exist_ok=True)
+        self.log_path = log_path
+        self.state_path = os.path.join(state_dir, 'access-index.json')
+        self.rollups_path = os.path.join(state_dir, 'access-rollups.json')
+        self.lock_path = os.path.join(state_dir, 'access-index.lock')
+        self.retention_days = retention_days
+        self.max_paths = max_paths
+        self.logger = logging.getLogger(__name__)
+        self._thread = None
+
+    def rollups(self):
+        """The current rollups (cheap: one small JSON file)"""
+        return _read_json(self.rollups_path, _empty_rollups())
+
+    def start(self, interval_seconds=60):
+        """Index new log lines periodically in the background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self.logger.error(f"Access log indexing failed: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='access-indexer', daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        """Index everything appended since the last run; returns the number of records read"""
+        with file_lock(self.lock_path):
+            state = _read_json(self.state_path, {})
+            rollups = self.rollups()
+            rollups.setdefault('days', {})
+            indexed = self._index_new_lines(state, rollups)
+            if indexed:
+                self._prune(rollups)
+                rollups['updated_at'] = time.time()
+                atomic_write(self.rollups_path, json.dumps(rollups, separators=(',', ':')).encode('utf-8'))
+            atomic_write(self.state_path, json.dumps(state).encode('utf-8'))
+        return indexed
+
+    def _index_new_lines(self, state, rollups):
+        """Feed unread segments and the live log into rollups, advancing state"""
+        try:
+            live = os.stat(self.log_path)
+        except FileNotFoundError:
+            return 0
+        indexed = 0
+
+        # A shrunken file under a known inode means the inode was reused by a new log
+        if state.get('inode') != live.st_ino or live.st_size < state.get('offset', 0):
+            # The file we were reading was rotated; catch up on segments we have not finished
+            offset = state.get('offset', 0) if state.get('inode') is not None else 0
+            for segment in self._unread_segments(state.get('last_segment')):
+                indexed += self._read_from(segment, offset, rollups)[0]
+                state['last_segment'] = _segment_base(segment)
+                offset = 0
+            state['inode'] = live.st_ino
+            state['offset'] = 0
+
+        count, state['offset'] = self._read_from(self.log_path, state['offset'], rollups, complete_lines_only=True)
+        return indexed + count
+
+    def _unread_segments(self, last_segment):
+        """Rotated segments newer than the last one indexed, oldest first"""
+        segments = log_segments(self.log_path)
+        if last_segment is None:
+            return segments
+        names = [_segment_base(segment) for segment in segments]
+        if last_segment in names:
+            return segments[names.index(last_segment) + 1:]
+        # Our checkpoint was pruned; everything still on disk is newer than it
+        return [segment for segment, name in zip(segments, names) if name > last_segment]
+
+    def _read_from(self, path, offset, rollups, complete_lines_only=False):
+        """Parse lines from byte offset; returns (records, new offset)"""
+        try:
+            f = open_log_segment(path, binary=True)
+        except FileNotFoundError:
+            # Compressed by the archiver since we listed it
+            f = open_log_segment(path + '.gz', binary=True)
+        count = 0
+        with f:
+            f.seek(offset)
+            for line in f:
+                if complete_lines_only and not line.endswith(b'\n'):
+                    # A worker is still writing this line; read it next time
+                    break
+                offset += len(line)
+                if self._add(line, rollups):
+                    count += 1
+        return count, offset
+
+    def _add(self, line, rollups):
+        """Add one access record to the rollups"""
+        try:
+            record = json.loads(line)
+            path = record['path']
+            status = int(record['status'])
+            hour = record['ts'][:13]
+            day = record['ts'][:10]
+        except (ValueError, KeyError, TypeError):
+            # Lines from before structured access logging
+            return False
+
+        # Sampled records stand for 1 / sample_rate requests
+        weight = 1 / record.get('sample_rate', 1.0) if record.get('sample_rate') else 1
+        status_class = f"{status // 100}xx"
+        bot = is_automated(classify_user_agent(record.get('ua') or ''))
+        page_view = not bot and is_page_view(record.get('method'), record.get('endpoint'), status)
+
+        bucket = rollups['hours'].setdefault(hour, {'requests': 0, 'page_views': 0, 'bots': 0, 'status': {}})
+        bucket['requests'] += weight
+        bucket['page_views'] += weight if page_view else 0
+        bucket['bots'] += weight if bot else 0
+        statuses = bucket.setdefault('status', {})
+        statuses[status_class] = statuses.get(status_class, 0) + weight
+
+        rollups['totals']['requests'] += weight
+        rollups['totals']['page_views'] += weight if page_view else 0
+        if page_view:
+            daily = rollups['days'].setdefault(day, {'paths': {}, 'referrers': {}})
+            daily['paths'][path] = daily['paths'].get(path, 0) + weight
+            referrer = urlsplit(record.get('referrer') or '').netloc
+            if referrer:
+                daily['referrers'][referrer] = daily['referrers'].get(referrer, 0) + weight
+        return True
+
+    def _prune(self, rollups):
+        """Drop hours and days past retention and keep only each day's busiest paths and referrers"""
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        hour_cutoff = cutoff.strftime('%Y-%m-%dT%H')
+        day_cutoff = cutoff.strftime('%Y-%m-%d')
+        rollups['hours'] = {hour: bucket for hour, bucket in rollups['hours'].items() if hour >= hour_cutoff}
+        rollups['days'] = {day: daily for day, daily in rollups['days'].items() if day >= day_cutoff}
+        for daily in rollups['days'].values():
+            for key in ('paths', 'referrers'):
+                if len(daily[key]) > self.max_paths:
+                    busiest = sorted(daily[key].items(), key=lambda item: item[1], reverse=True)
+                    daily[key] = dict(busiest[:self.max_paths])
+        # All-time counters from before they were kept per hour and per day
+        for key in ('paths', 'referrers', 'status'):
+            rollups.pop(key, None)
+
+def is_page_view(method, endpoint, status):
+    """A successful GET of a page endpoint (redirects and 304 revalidations are not views)"""
+    return method == 'GET' and 200 <= status < 300 and endpoint in PAGE_ENDPOINTS
+
+def sum_counts(buckets, key):
+    """Add up one {name: count} field across buckets"""
+    totals = {}
+    for bucket in buckets:
+        for name, count in bucket.get(key, {}).items():
+            totals[name] = totals.get(name, 0) + count
+    return totals
+
+def top(counts, limit=5, exclude=()):
+    """The largest (key, count) pairs, counts rounded for display"""
+    items = [(key, round(count)) for key, count in counts.items() if key not in exclude]
+    return sorted(items, key=lambda item: item[1], reverse=True)[:limit]
+
+def _segment_base(path):
+    """Segment file name without directory or .gz suffix"""
+    name = os.path.basename(path)
+    return name[:-3] if name.endswith('.gz') else name
+
+def _empty_rollups():
+    """Rollups before anything has been indexed"""
+    return {'hours': {}, 'days': {}, 'totals': {'requests': 0, 'page_views': 0}, 'updated_at': None}
+
+def _read_json(path, default):
+    """Load a JSON state file, or default if it is missing or damaged"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
@@ -0,0 +1,91 @@
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+# Link unfurlers fetch a URL once when it is pasted into a chat or social post
+UNFURLER_SIGNATURES = re.compile(
+    r'facebookexternalhit|facebookcatalog|slackbot|slack-imgproxy|twitterbot|linkedinbot|'
+    r'discordbot|whatsapp|telegrambot|skypeuripreview|embedly|iframely|pinterest|'
+    r'redditbot|applebot|vkshare|bitlybot|google-pagerenderer',
+    re.IGNORECASE
+)
+
+# Search engines, SEO crawlers and uptime checkers
+CRAWLER_SIGNATURES = re.compile(
+    r'bot\b|bot/|crawl|spider|slurp|mediapartners|adsbot|yandex|baidu|duckduckgo|semrush|'
+    r'ahrefs|mj12|dotbot|petalbot|bytespider|gptbot|ccbot|claudebot|perplexity|archive\.org|'
+    r'ia_archiver|uptimerobot|pingdom|statuscake|site24x7|monitor|preview|feedfetcher|'
+    r'lighthouse|pagespeed|gtmetrix',
+    re.IGNORECASE
+)
+
+# HTTP libraries, headless browsers and vulnerability scanners
+TOOL_SIGNATURES = re.compile(
+    r'curl|wget|python-requests|python-urllib|python-httpx|aiohttp|go-http-client|java/|'
+    r'okhttp|libwww|httpclient|node-fetch|axios|scrapy|headlesschrome|phantomjs|selenium|'
+    r'puppeteer|playwright|nmap|nikto|sqlmap|zgrab|masscan|nuclei|httpie',
+    re.IGNORECASE
+)
+
+HUMAN = 'human'
+
+# Every category classify_request can return; the order is part of the download store format
+CATEGORIES = (HUMAN, 'unfurler', 'crawler', 'tool', 'empty', 'suspect')
+
+@lru_cache(maxsize=2048)
+def classify_user_agent(user_agent):
+    """Classify a User-Agent string as human, unfurler, crawler, tool or empty"""
+    if not user_agent or not user_agent.strip():
+        return 'empty'
+    if UNFURLER_SIGNATURES.search(user_agent):
+        return 'unfurler'
+    if CRAWLER_SIGNATURES.search(user_agent):
+        return 'crawler'
+    if TOOL_SIGNATURES.search(user_agent):
+        return 'tool'
+    # Every mainstream browser identifies itself as Mozilla/5.0
+    if not user_agent.startswith('Mozilla/'):
+        return 'tool'
+    return HUMAN
+
+def classify_request(request):
+    """Classify a request by its User-Agent and by how real browsers behave"""
+    category = classify_user_agent(request.headers.get('User-Agent', ''))
+    if category != HUMAN:
+        return category
+    # Browsers always GET a download and always send Accept-Language; probes often do neither
+    if request.method == 'HEAD' or not request.headers.get('Accept-Language'):
+        return 'suspect'
+    return HUMAN
+
+def is_automated(category):
+    """True for any category other than a human visitor"""
+    return category != HUMAN
+
+class TrafficCounter:
+    """Thread-safe in-process counts of (event, category)"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, event, category):
+        """Count one event for a traffic category"""
+        with self._lock:
+            self._counts[(event, category)] += 1
+
+    def snapshot(self):
+        """Copy of the current counts"""
+        with self._lock:
+            return dict(self._counts)
+
+# Global traffic counter instance
+traffic_counter = None
+
+def get_traffic_counter():
+    """Get the global traffic counter"""
+    global traffic_counter
+    if traffic_counter is None:
+        traffic_counter = TrafficCounter()
+    return traffic_counter
@@ -0,0 +1,103 @@
+import threading
+import time
+import logging
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Fails fast after repeated failures of an unreliable dependency.
+
+    After failure_threshold consecutive failures the breaker opens and every call
+    is rejected for reset_timeout_seconds. Then one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout_seconds=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.logger = logging.getLogger(__name__)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state, moving open to half-open once the cool-down has passed"""
+        with self._lock:
+            if self._state == OPEN and self._retry_after() <= 0:
+                self._state = HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Reserve a call, or raise CircuitOpenError if calls are not allowed"""
+        with self._lock:
+            if self._state == OPEN:
+                if self._retry_after() > 0:
+                    raise CircuitOpenError(self.name, self._retry_after())
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                # Only a single trial call probes a recovering dependency
+                if self._trial_running:
+                    raise CircuitOpenError(self.name, self.reset_timeout_seconds)
+                self._trial_running = True
+
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        with self._lock:
+            if self._state != CLOSED:
+                self.logger.info(f"{self.name} circuit closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self, error=None):
+        """Count a failed call, opening the breaker at the threshold"""
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error is not None else None
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.logger.warning(f"{self.name} circuit opened after {self._failures} failures: {self._last_error}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker"""
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        """State, failure count and remaining cool-down for dashboards"""
+        state = self.state
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_after_seconds': round(max(0.0, self._retry_after()), 1) if state == OPEN else 0,
+                'last_error': self._last_error
+            }
+
+    def _retry_after(self):
+        """Seconds left in the cool-down (caller holds the lock)"""
+        return self._opened_at + self.reset_timeout_seconds - time.monotonic()
@@ -0,0 +1,93 @@
+import gzip
+import zlib
+
+from utils.http_cache import variant_etag
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# File suffix used for precompressed variants, by Content-Encoding
+SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+# Text assets worth compressing; images, PDFs and Office files are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html')
+
+# Response mimetypes worth compressing on the fly (PDF, DOCX, zip etc. are left alone)
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'text/javascript',
+    'application/json', 'application/xml', 'application/javascript', 'image/svg+xml',
+])
+
+def available_encodings():
+    """Content-Encodings this process can produce, best first"""
+    return ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+def compress(data, encoding, level=None):
+    """Compress bytes with the given Content-Encoding (maximum level unless given)"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic, so equal input gives equal bytes
+        return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+    if encoding == 'br' and BROTLI_AVAILABLE:
+        return brotli.compress(data, quality=11 if level is None else level)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of byte chunks, flushing after each so streaming is preserved"""
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    elif encoding == 'br' and BROTLI_AVAILABLE:
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def compress_response(response, request, min_size=512, gzip_level=6, brotli_quality=5):
+    """Compress an eligible Flask response in place for the client's Accept-Encoding"""
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request, available_encodings())
+    if encoding is None:
+        return response
+    level = brotli_quality if encoding == 'br' else gzip_level
+
+    if response.is_streamed:
+        response.response = compress_stream(response.iter_encoded(), encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding, level))
+
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag names one representation, so the compressed body needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(variant_etag(etag, encoding))
+    return response
+
+def negotiate_encoding(request, encodings=('br', 'gzip')):
+    """Pick the best of encodings the client accepts, or None for identity"""
+    if not request.accept_encodings:
+        return None
+    return request.accept_encodings.best_match(encodings)
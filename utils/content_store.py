@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+from utils.shared_state import atomic_write
+
+class ContentEntry:
+    """Parsed content of one data file plus what it was validated against.
+
+    digest and modified are computed once when the file is (re)loaded or saved,
+    so they can back ETag / Last-Modified headers without any per-request work.
+    """
+
+    __slots__ = ('data', 'digest', 'modified', 'signature', 'generation', 'checked_at')
+
+    def __init__(self, data, digest, modified, signature, generation, checked_at):
+        self.data = data
+        self.digest = digest
+        self.modified = modified
+        self.signature = signature
+        self.generation = generation
+        self.checked_at = checked_at
+
+class ContentStore:
+    """In-process store for the data/*.json content files.
+
+    Each file is parsed once and kept in memory. Reads are a dict lookup; at most
+    once per revalidate interval a read also stats the file, so edits made outside
+    the app (a restore, a git pull) are picked up without any TTL. Saves made by
+    any worker are seen immediately through the shared generation counter.
+    """
+
+    def __init__(self, data_dir, generations, revalidate_interval_ms=1000):
+        self.data_dir = data_dir
+        self.generations = generations
+        self.revalidate_interval = revalidate_interval_ms / 1000.0
+        self.logger = logging.getLogger(__name__)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def path(self, filename):
+        """Return the absolute path of a data file"""
+        return os.path.join(self.data_dir, filename)
+
+    def get(self, filename):
+        """Return the parsed content of filename (treat it as read-only)"""
+        return self.entry(filename).data
+
+    def entry(self, filename):
+        """Return the current ContentEntry for filename"""
+        entry = self._entries.get(filename)
+        generation = self.generations.get(filename)
+        if (entry is not None and entry.generation == generation
+                and time.monotonic() - entry.checked_at < self.revalidate_interval):
+            return entry
+
+        with self._lock:
+            return self._revalidate(filename, generation)
+
+    def on_change(self, listener):
+        """Call listener(filename) whenever this process sees new content for a file"""
+        self._listeners.append(listener)
+        return listener
+
+    def _notify(self, filename, previous, entry):
+        """Tell listeners about filename if its content hash changed"""
+        if previous is not None and previous.digest != entry.digest:
+            for listener in self._listeners:
+                listener(filename)
+
+    def _revalidate(self, filename, generation):
+        """Stat filename and reload it if it changed since it was last parsed"""
+        now = time.monotonic()
+        entry = self._entries.get(filename)
+        signature = self._signature(filename)
+
+        if entry is not None and entry.signature == signature and entry.generation == generation:
+            entry.checked_at = now
+            return entry
+
+        previous = entry
+        entry = self._load(filename, signature, generation, previous)
+        self._entries[filename] = entry
+        self._notify(filename, previous, entry)
+        return entry
+
+    def _signature(self, filename):
+        """Cheap change detector for a file: (mtime_ns, size, inode)"""
+        try:
+            st = os.stat(self.path(filename))
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self, filename, signature, generation, previous):
+        """Parse filename, keeping the previous copy if the file is unreadable"""
+        file_path = self.path(filename)
+        if signature is None:
+            self.logger.error(f"Data file {file_path} not found")
+            return self._make_entry({}, b'{}', time.time(), signature, generation)
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+            self.logger.info(f"Loaded {filename} into content store")
+            return self._make_entry(data, raw, signature[0] / 1e9, signature, generation)
+        except json.JSONDecodeError:
+            self.logger.error(f"Invalid JSON in {file_path}")
+            if previous is not None:
+                return ContentEntry(previous.data, previous.digest, previous.modified,
+                                    signature, generation, time.monotonic())
+            return self._make_entry({}, b'{}', time.time(), signature, generation)
+
+    def _make_entry(self, data, raw, modified, signature, generation):
+        """Build an entry, hashing the raw file content once"""
+        digest = hashlib.sha256(raw).hexdigest()
+        return ContentEntry(data, digest, modified, signature, generation, time.monotonic())
+
+    def save(self, filename, data):
+        """Atomically write data to filename and publish it to every worker.
+
+        Returns False without touching the file when the content is unchanged.
+        """
+        previous = self.entry(filename)
+        # Compare parsed content: the admin editor posts keys in a different order than the file has
+        if previous.signature is not None and data == previous.data:
+            return False
+
+        payload = json.dumps(data, indent=4).encode('utf-8')
+
+        with self._lock:
+            atomic_write(self.path(filename), payload)
+            generation = self.generations.bump(filename)
+            signature = self._signature(filename)
+            # Keep our own copy so later mutations by the caller don't leak into the store
+            entry = self._make_entry(json.loads(payload), payload, signature[0] / 1e9,
+                                     signature, generation)
+            self._entries[filename] = entry
+            self._notify(filename, previous, entry)
+        return True
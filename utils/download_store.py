@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from utils.bot_detection import CATEGORIES
+from utils.shared_state import atomic_write, file_lock
+
+# Codes stored in the format byte; only ever append to this tuple
+FORMATS = ('pdf', 'word')
+
+# Fixed-width event: unix time, format code, UA class code, 2 pad bytes, 8-byte IP hash
+EVENT = struct.Struct('<IBB2x8s')
+
+# strftime pattern of the bucket key at each resolution
+RESOLUTIONS = {'hour': '%Y-%m-%dT%H', 'day': '%Y-%m-%d', 'month': '%Y-%m'}
+
+class DownloadStore:
+    """Append-only log of resume downloads with hourly, daily and monthly rollups.
+
+    Raw events are 16-byte records in one file per month; a download is one
+    O_APPEND write, so workers never interleave partial records. Its hour,
+    day and month buckets are only counted in memory; a background thread
+    (and every query) folds those counts into rollups.json under a lock,
+    which is all the dashboard ever reads. Hourly buckets are kept for a
+    week, daily ones for about a year and monthly ones for good; raw months
+    past retention are deleted, and rebuild() can recreate the rollups from
+    them (including counts a killed worker never flushed).
+    """
+
+    def __init__(self, store_dir, salt, hourly_retention_days=7, daily_retention_days=400,
+                 raw_retention_months=12):
+        self.events_dir = os.path.join(store_dir, 'events')
+        os.makedirs(self.events_dir, exist_ok=True)
+        self.rollups_path = os.path.join(store_dir, 'rollups.json')
+        self.lock_path = os.path.join(store_dir, 'rollups.lock')
+        self.salt = salt.encode('utf-8') if isinstance(salt, str) else salt
+        self.hourly_retention_days = hourly_retention_days
+        self.daily_retention_days = daily_retention_days
+        self.raw_retention_months = raw_retention_months
+        self.logger = logging.getLogger(__name__)
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, format_type, user_ip, category, timestamp=None):
+        """Append one download event and count it for the next rollup flush"""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        ip_hash = hashlib.blake2b((user_ip or '').encode('utf-8'), digest_size=8, key=self.salt[:64]).digest()
+        event = EVENT.pack(timestamp, FORMATS.index(format_type), CATEGORIES.index(category), ip_hash)
+
+        month = datetime.fromtimestamp(timestamp).strftime('%Y-%m')
+        fd = os.open(os.path.join(self.events_dir, f'{month}.bin'), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, event)
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            for key in _bucket_counts(timestamp, format_type, category):
+                self._pending[key] += 1
+
+    def start(self, flush_interval_seconds=10):
+        """Fold this worker's pending counts into the rollups periodically"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(flush_interval_seconds)
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Failed to flush download rollups: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='download-rollups', daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        """Merge pending counts into rollups.json and apply retention"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+        with file_lock(self.lock_path):
+            rollups = self._read_rollups()
+            for (resolution, bucket, combined), count in pending.items():
+                counts = rollups[resolution].setdefault(bucket, {})
+                counts[combined] = counts.get(combined, 0) + count
+            self._prune(rollups)
+            atomic_write(self.rollups_path, json.dumps(rollups, separators=(',', ':')).encode('utf-8'))
+
+    def query(self, start, end, resolution='day'):
+        """Buckets between two datetimes at the given resolution, oldest first.
+
+        Each bucket is {'bucket', 'total', 'humans', 'formats': {format: n},
+        'categories': {category: n}}; empty buckets are included.
+        """
+        self.flush()
+        stored = self._read_rollups()[resolution]
+        buckets = []
+        for key in _bucket_keys(start, end, resolution):
+            counts = stored.get(key, {})
+            formats = {}
+            categories = {}
+            for combined, count in counts.items():
+                format_type, category = combined.split(':')
+                formats[format_type] = formats.get(format_type, 0) + count
+                categories[category] = categories.get(category, 0) + count
+            buckets.append({
+                'bucket': key,
+                'total': sum(counts.values()),
+                'humans': categories.get('human', 0),
+                'formats': formats,
+                'categories': categories
+            })
+        return buckets
+
+    def totals(self, start, end, resolution='day'):
+        """Summed counts over a range"""
+        buckets = self.query(start, end, resolution)
+        formats = {}
+        for bucket in buckets:
+            for format_type, count in bucket['formats'].items():
+                formats[format_type] = formats.get(format_type, 0) + count
+        return {
+            'total': sum(bucket['total'] for bucket in buckets),
+            'humans': sum(bucket['humans'] for bucket in buckets),
+            'formats': formats
+        }
+
+    def events(self, month):
+        """Decode one month of raw events as (timestamp, format, category, ip_hash) tuples"""
+        try:
+            with open(os.path.join(self.events_dir, f'{month}.bin'), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        # A torn final record (crash mid-write) is ignored
+        usable = len(data) - len(data) % EVENT.size
+        return [
+            (timestamp, FORMATS[format_code], CATEGORIES[category_code], ip_hash.hex())
+            for timestamp, format_code, category_code, ip_hash in EVENT.iter_unpack(data[:usable])
+        ]
+
+    def rebuild(self):
+        """Recreate the rollups from the raw events still on disk"""
+        with self._lock:
+            # Already in the raw files, so flushing them later would count them twice
+            self._pending = Counter()
+        rollups = _empty_rollups()
+        for name in sorted(os.listdir(self.events_dir)):
+            if name.endswith('.bin'):
+                for timestamp, format_type, category, _ in self.events(name[:-len('.bin')]):
+                    for resolution, bucket, combined in _bucket_counts(timestamp, format_type, category):
+                        counts = rollups[resolution].setdefault(bucket, {})
+                        counts[combined] = counts.get(combined, 0) + 1
+        with file_lock(self.lock_path):
+            self._prune(rollups)
+            atomic_write(self.rollups_path, json.dumps(rollups, separators=(',', ':')).encode('utf-8'))
+        return rollups
+
+    def _prune(self, rollups):
+        """Downsample: drop hourly and daily buckets (and raw months) past retention"""
+        now = datetime.now()
+        hour_cutoff = (now - timedelta(days=self.hourly_retention_days)).strftime(RESOLUTIONS['hour'])
+        day_cutoff = (now - timedelta(days=self.daily_retention_days)).strftime(RESOLUTIONS['day'])
+        rollups['hour'] = {key: value for key, value in rollups['hour'].items() if key >= hour_cutoff}
+        rollups['day'] = {key: value for key, value in rollups['day'].items() if key >= day_cutoff}
+
+        month_index = now.year * 12 + now.month - 1 - self.raw_retention_months
+        raw_cutoff = f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+        for name in os.listdir(self.events_dir):
+            if name.endswith('.bin') and name[:-len('.bin')] < raw_cutoff:
+                os.remove(os.path.join(self.events_dir, name))
+
+    def _read_rollups(self):
+        """Load the rollups, or empty ones"""
+        try:
+            with open(self.rollups_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return _empty_rollups()
+
+def _bucket_counts(timestamp, format_type, category):
+    """The (resolution, bucket, 'format:category') keys one event is counted under"""
+    moment = datetime.fromtimestamp(timestamp)
+    combined = f"{format_type}:{category}"
+    return [(resolution, moment.strftime(pattern), combined) for resolution, pattern in RESOLUTIONS.items()]
+
+def _empty_rollups():
+    """Rollups before the first download"""
+    return {resolution: {} for resolution in RESOLUTIONS}
+
+def _bucket_keys(start, end, resolution):
+    """Every bucket key from start to end inclusive"""
+    keys = []
+    if resolution == 'month':
+        index = start.year * 12 + start.month - 1
+        last = end.year * 12 + end.month - 1
+        while index <= last:
+            keys.append(f"{index // 12:04d}-{index % 12 + 1:02d}")
+            index += 1
+        return keys
+    step = timedelta(hours=1) if resolution == 'hour' else timedelta(days=1)
+    pattern = RESOLUTIONS[resolution]
+    moment = start
+    while moment.strftime(pattern) <= end.strftime(pattern):
+        keys.append(moment.strftime(pattern))
+        moment += step
+    return keys
@@ -0,0 +1,64 @@
+import os
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+from utils.shared_state import APP_DIR
+
+EMAIL_TEMPLATE_DIR = os.path.join(APP_DIR, 'templates', 'email')
+
+def nl2br(value):
+    """Escape text and turn its line breaks into <br> tags"""
+    return Markup('<br>'.join(escape(line) for line in str(value).split('\n')))
+
+def format_timestamp(value):
+    """Format a unix timestamp for an email table"""
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+
+class EmailTemplates:
+    """Email bodies compiled once from templates/email.
+
+    Every template is compiled when the instance is created and never checked
+    for changes again, so sending a message only runs the compiled render code.
+    """
+
+    def __init__(self, template_dir=EMAIL_TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+            cache_size=-1
+        )
+        self.env.filters['nl2br'] = nl2br
+        self.env.filters['timestamp'] = format_timestamp
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+
+    def render(self, template_name, **context):
+        """Render templates/email/<template_name>.html"""
+        return self._templates[f'{template_name}.html'].render(**context)
+
+def build_mime_message(sender, recipients, subject, html):
+    """Build an HTML MIME message for smtplib"""
+    # Built fresh each time on purpose: deep-copying a prebuilt skeleton is slower than this,
+    # and nearly all the cost is encoding and serialising the body, which differs per message
+    message = MIMEMultipart()
+    message['From'] = sender
+    message['To'] = recipients if isinstance(recipients, str) else ', '.join(recipients)
+    message['Subject'] = subject
+    message.attach(MIMEText(html, 'html', 'utf-8'))
+    return message
+
+# Global email templates instance
+email_templates = None
+
+def get_email_templates():
+    """Get the global email templates, compiling them on first use"""
+    global email_templates
+    if email_templates is None:
+        email_templates = EmailTemplates()
+    return email_templates
@@ -0,0 +1,67 @@
+import mmap
+import os
+import struct
+import logging
+
+from utils.shared_state import runtime_path, file_lock
+
+# Content files whose generation is shared between workers. Slots are positional,
+# so only ever append to this tuple.
+GENERATION_SLOTS = ('home.json', 'about.json', 'experience.json')
+
+class GenerationCounter:
+    """Cross-process generation counters stored in a small mmap'd file.
+
+    Every gunicorn worker maps the same file, so reading a counter is a memory
+    access and a bump made by one worker is visible to all others immediately.
+    """
+
+    SLOT_FORMAT = '<Q'
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+    def __init__(self, path, slots=GENERATION_SLOTS):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.slots = {name: index for index, name in enumerate(slots)}
+        self.logger = logging.getLogger(__name__)
+        self._mm = self._open_map(len(slots) * self.SLOT_SIZE)
+
+    def _open_map(self, size):
+        """Create the counter file if needed and map it into memory"""
+        with file_lock(self.lock_path):
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                return mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+
+    def get(self, name):
+        """Return the current generation for name (0 for untracked names)"""
+        index = self.slots.get(name)
+        if index is None:
+            return 0
+        return struct.unpack_from(self.SLOT_FORMAT, self._mm, index * self.SLOT_SIZE)[0]
+
+    def bump(self, name):
+        """Increment the generation for name so every worker drops its cached copy"""
+        index = self.slots.get(name)
+        if index is None:
+            return 0
+        offset = index * self.SLOT_SIZE
+        with file_lock(self.lock_path):
+            generation = struct.unpack_from(self.SLOT_FORMAT, self._mm, offset)[0] + 1
+            struct.pack_into(self.SLOT_FORMAT, self._mm, offset, generation)
+        self.logger.debug(f"Generation for {name} bumped to {generation}")
+        return generation
+
+# Global generation counter instance
+generation_counter = None
+
+def get_generation_counter():
+    """Get the global generation counter instance"""
+    global generation_counter
+    if generation_counter is None:
+        generation_counter = GenerationCounter(runtime_path('cache', 'generations.bin'))
+    return generation_counter
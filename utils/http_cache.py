@@ -0,0 +1,27 @@
+import hashlib
+
+def combined_etag(*parts):
+    """Build a short strong ETag value from version tokens"""
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+def variant_etag(etag, encoding):
+    """ETag of the representation of etag compressed with encoding"""
+    return f"{etag}-{encoding}" if encoding else etag
+
+def is_not_modified(request, etag, last_modified=None):
+    """Check If-None-Match / If-Modified-Since against the current validators"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag and Last-Modified headers to a response"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    return response
@@ -1,13 +1,287 @@
+import atexit
+import gzip
+import json
 import logging
 import os
+import queue
+import random
+import re
+import shutil
 import sys
+import threading
+import time
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-def setup_logging(app=None, log_level=logging.INFO):
+try:
+    import fcntl
+except ImportError:
+    # Windows development machines run a single process, which is always the rotation leader
+    fcntl = None
+
+class RotationLeader:
+    """Elects the one process on the dyno that rotates log files.
+
+    The leader holds an exclusive flock on a lock file for as long as it lives.
+    Other processes retry now and then, so leadership moves on when the leader's
+    worker exits and the kernel releases its lock.
+    """
+
+    def __init__(self, lock_path, retry_seconds=30):
+        self.lock_path = lock_path
+        self.retry_seconds = retry_seconds
+        self._lock_file = None
+        self._next_attempt = 0.0
+
+    def is_leader(self):
+        """True if this process holds (or just acquired) the rotation lock"""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        self._next_attempt = now + self.retry_seconds
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+# Rotated segments are named <log>.<YYYYmmdd-HHMMSS>[-n][.gz]; <log>.<n> is the old numbered scheme
+SEGMENT_SUFFIX = re.compile(r'^\.(?:(\d{8}-\d{6})(?:-(\d+))?|(\d+))(\.gz)?$')
+
+def log_segments(log_path):
+    """Rotated segments of a log file (plain or gzipped), oldest first"""
+    log_dir, name = os.path.split(log_path)
+    segments = []
+    for filename in os.listdir(log_dir or '.'):
+        if not filename.startswith(name):
+            continue
+        match = SEGMENT_SUFFIX.match(filename[len(name):])
+        if match:
+            # Numbered backups predate the timestamped ones, and a higher number is older
+            if match.group(1):
+                key = (1, match.group(1), int(match.group(2) or 0))
+            else:
+                key = (0, '', -int(match.group(3)))
+            segments.append((key, os.path.join(log_dir, filename)))
+    return [path for _, path in sorted(segments)]
+
+def open_log_segment(path, binary=False):
+    """Open a live, rotated or archived log file for reading (text unless binary)"""
+    if binary:
+        return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """Size-rotated log file that several processes append to.
+
+    Only the rotation leader renames files. Every other process notices the
+    rename by the changed inode and reopens the file, like WatchedFileHandler.
+    Segments are renamed once, to a timestamped name, and compressed and pruned
+    later by the LogArchiver.
+    """
+
+    def __init__(self, filename, leader, maxBytes=0, backupCount=0, archiver=None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount)
+        self.leader = leader
+        self.archiver = archiver
+        self._stream_id = self._file_id()
+        if archiver is not None:
+            archiver.watch(self.baseFilename, backupCount)
+
+    def shouldRollover(self, record):
+        """Reopen after another process rotated, and let only the leader rotate"""
+        self._reopen_if_rotated()
+        if not self.leader.is_leader():
+            return False
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        """Rename the file to a timestamped segment and start a new one"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, self._segment_name())
+        self.stream = self._open()
+        self._stream_id = self._file_id()
+        if self.archiver is not None:
+            self.archiver.wake()
+
+    def _segment_name(self):
+        """Unused timestamped name for the segment being rotated out"""
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        candidate = f"{self.baseFilename}.{stamp}"
+        counter = 0
+        while os.path.exists(candidate) or os.path.exists(candidate + '.gz'):
+            counter += 1
+            candidate = f"{self.baseFilename}.{stamp}-{counter}"
+        return candidate
+
+    def _reopen_if_rotated(self):
+        """Switch to the current file if ours was renamed away"""
+        current = self._file_id()
+        if current is not None and current == self._stream_id:
+            return
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+        self._stream_id = self._file_id()
+
+    def _file_id(self):
+        """(device, inode) of the file currently at baseFilename"""
+        try:
+            stat = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+class LogArchiver:
+    """Gzips rotated log segments and prunes old ones in a background thread.
+
+    Runs in every process but only acts in the rotation leader. A segment is
+    left alone for settle_seconds after rotation, so workers that still hold it
+    open have reopened the new file before it is compressed. Retention keeps at
+    most backupCount segments per log, none older than max_age_days, and at
+    most max_total_bytes of segments per log.
+    """
+
+    def __init__(self, leader, compress=True, max_age_days=14, max_total_bytes=100 * 1024 * 1024,
+                 settle_seconds=60, check_interval_seconds=300):
+        self.leader = leader
+        self.compress = compress
+        self.max_age_days = max_age_days
+        self.max_total_bytes = max_total_bytes
+        self.settle_seconds = settle_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._logs = {}
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, log_path, backup_count):
+        """Manage the rotated segments of log_path"""
+        self._logs[log_path] = backup_count
+
+    def wake(self):
+        """Check for work now instead of at the next interval"""
+        self._wake.set()
+
+    def start(self):
+        """Start the background archive thread (once per process)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='log-archiver', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Archive and prune until the process exits"""
+        while True:
+            try:
+                if self.leader.is_leader():
+                    self.run_once()
+            except Exception as e:
+                # Never log through the queue from here: a failing disk would feed itself
+                sys.stderr.write(f"Log archiver error: {str(e)}\n")
+            # Wake up again once freshly rotated segments have settled
+            self._wake.wait(self.check_interval_seconds)
+            if self._wake.is_set():
+                self._wake.clear()
+                time.sleep(self.settle_seconds)
+
+    def run_once(self):
+        """Compress settled segments and apply retention to every watched log"""
+        for log_path, backup_count in self._logs.items():
+            if self.compress:
+                for segment in log_segments(log_path):
+                    if not segment.endswith('.gz') and time.time() - os.path.getmtime(segment) >= self.settle_seconds:
+                        self._compress(segment)
+            self._prune(log_path, backup_count)
+
+    def _compress(self, segment):
+        """Replace a segment with a .gz copy that keeps its modification time"""
+        archive = segment + '.gz'
+        temp = archive + '.tmp'
+        with open(segment, 'rb') as source, gzip.open(temp, 'wb') as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        mtime = os.path.getmtime(segment)
+        os.utime(temp, (mtime, mtime))
+        os.replace(temp, archive)
+        os.remove(segment)
+
+    def _prune(self, log_path, backup_count):
+        """Delete the oldest segments beyond the count, age and size limits"""
+        segments = log_segments(log_path)
+        cutoff = time.time() - self.max_age_days * 86400
+        keep = []
+        total = 0
+        # Walk newest first so the limits drop the oldest segments
+        for segment in reversed(segments):
+            try:
+                stat = os.stat(segment)
+            except FileNotFoundError:
+                continue
+            too_many = backup_count and len(keep) >= backup_count
+            if too_many or stat.st_mtime < cutoff or total + stat.st_size > self.max_total_bytes:
+                os.remove(segment)
+                continue
+            keep.append(segment)
+            total += stat.st_size
+
+class LoggerNameFilter(logging.Filter):
+    """Pass records from one logger and its children only"""
+
+    def filter(self, record):
+        return record.name == self.name or record.name.startswith(self.name + '.')
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to the listener thread without touching the disk.
+
+    With the 'drop' policy a full queue discards the record instead of
+    stalling the request, and the number dropped is logged once space frees
+    up. With 'block' the caller waits for the listener to catch up.
+    """
+
+    def __init__(self, log_queue, overflow_policy='drop'):
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.overflow_policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            warning = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                        f"Log queue full, dropped {dropped} records", None, None)
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                self.dropped += dropped
+
+# The running listener, stopped (and flushed) at exit
+log_listener = None
+
+def setup_logging(app=None, log_level=logging.INFO, queue_size=10000, overflow_policy='drop', archive_settings=None):
     """
     Setup comprehensive logging for the Flask application
+
+    Loggers only put records on a bounded in-memory queue; a single listener
+    thread per process formats them and writes the files.
     """
+    global log_listener
+
     # Create logs directory if it doesn't exist
     log_dir = 'logs'
     if not os.path.exists(log_dir):
@@ -26,75 +300,125 @@ def setup_logging(app=None, log_level=logging.INFO):
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     
-    # Clear any existing handlers
+    # Clear any existing handlers (and a previous listener)
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
+    # Only one process on the dyno renames files, whichever worker holds this lock
+    leader = RotationLeader(os.path.join(log_dir, '.rotation.lock'))
+    archive_settings = archive_settings or {}
+    archiver = LogArchiver(
+        leader,
+        compress=archive_settings.get('compress', True),
+        max_age_days=archive_settings.get('max_age_days', 14),
+        max_total_bytes=archive_settings.get('max_total_mb', 100) * 1024 * 1024,
+        settle_seconds=archive_settings.get('settle_seconds', 60),
+        check_interval_seconds=archive_settings.get('check_interval_seconds', 300)
+    )
+    handlers = []
+    
     # File handler for all logs
-    file_handler = RotatingFileHandler(
+    file_handler = SharedRotatingFileHandler(
         os.path.join(log_dir, 'portfolio.log'),
+        leader,
         maxBytes=10485760,  # 10MB
-        backupCount=10
+        backupCount=10,
+        archiver=archiver
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(file_handler)
+    handlers.append(file_handler)
     
     # File handler for errors only
-    error_handler = RotatingFileHandler(
+    error_handler = SharedRotatingFileHandler(
         os.path.join(log_dir, 'errors.log'),
+        leader,
         maxBytes=10485760,  # 10MB
-        backupCount=5
+        backupCount=5,
+        archiver=archiver
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(error_handler)
+    handlers.append(error_handler)
     
     # Console handler for development
     if app and app.debug:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.DEBUG)
         console_handler.setFormatter(simple_formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # Setup Flask app logging if app is provided
     if app:
         app.logger.setLevel(log_level)
         
         # Add security logging
-        security_handler = RotatingFileHandler(
+        security_handler = SharedRotatingFileHandler(
             os.path.join(log_dir, 'security.log'),
+            leader,
             maxBytes=10485760,  # 10MB
-            backupCount=5
+            backupCount=5,
+            archiver=archiver
         )
         security_handler.setLevel(logging.INFO)
         security_handler.setFormatter(detailed_formatter)
-        
-        security_logger = logging.getLogger('security')
-        security_logger.addHandler(security_handler)
+        security_handler.addFilter(LoggerNameFilter('security'))
+        handlers.append(security_handler)
         
         # Add access logging
-        access_handler = RotatingFileHandler(
+        access_handler = SharedRotatingFileHandler(
             os.path.join(log_dir, 'access.log'),
+            leader,
             maxBytes=10485760,  # 10MB
-            backupCount=10
+            backupCount=10,
+            archiver=archiver
         )
         access_handler.setLevel(logging.INFO)
-        access_handler.setFormatter(simple_formatter)
-        
-        access_logger = logging.getLogger('access')
-        access_logger.addHandler(access_handler)
+        # Access records are self-describing JSON lines
+        access_handler.setFormatter(logging.Formatter('%(message)s'))
+        access_handler.addFilter(LoggerNameFilter('access'))
+        handlers.append(access_handler)
+    
+    # Request threads only enqueue; the listener thread does all file I/O
+    log_queue = queue.Queue(maxsize=queue_size)
+    root_logger.addHandler(BoundedQueueHandler(log_queue, overflow_policy))
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+    archiver.start()
     
     logging.info("Logging system initialized")
     return root_logger
 
-def log_request(request, response_status=None):
-    """Log HTTP requests"""
-    access_logger = logging.getLogger('access')
-    access_logger.info(
-        f"{request.remote_addr} - {request.method} {request.path} - "
-        f"Status: {response_status} - User-Agent: {request.headers.get('User-Agent', 'Unknown')}"
-    )
+def _stop_log_listener():
+    """Flush queued records before the process exits"""
+    if log_listener is not None:
+        log_listener.stop()
+
+atexit.register(_stop_log_listener)
+
+def access_path_class(path):
+    """Group a request path for access-log sampling: static, api, admin or page"""
+    if path.startswith('/static/'):
+        return 'static'
+    if path.startswith('/api/'):
+        return 'api'
+    if path.startswith('/admin'):
+        return 'admin'
+    return 'page'
+
+def log_access(record, sample_rates=None):
+    """Write one JSON access-log line, sampled per path class (errors are always kept)"""
+    rate = (sample_rates or {}).get(access_path_class(record['path']), 1.0)
+    if record['status'] < 500:
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return False
+    # Analytics scale sampled lines back up by 1 / sample_rate
+    record['sample_rate'] = rate if record['status'] < 500 else 1.0
+    logging.getLogger('access').info(json.dumps(record, separators=(',', ':')))
+    return True
 
 def log_security_event(event_type, details, request=None):
     """Log security-related events"""
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+import logging
+
+from utils.shared_state import RUNTIME_DIR, atomic_write, file_lock, process_alive
+
+# Request latencies in seconds, from a cached page hit to a slow SMTP handshake
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class MetricsRegistry:
+    """Counters and histograms shared by all gunicorn workers.
+
+    Each worker updates plain in-memory dicts and a background thread publishes
+    them as worker-<pid>.json every few seconds. A scrape merges the files of
+    every worker; files of workers that have exited are folded into
+    retired.json so totals never go backwards while the dyno is up.
+    """
+
+    def __init__(self, metrics_dir):
+        os.makedirs(metrics_dir, exist_ok=True)
+        self.metrics_dir = metrics_dir
+        self.lock_path = os.path.join(metrics_dir, '.lock')
+        self.retired_path = os.path.join(metrics_dir, 'retired.json')
+        self.logger = logging.getLogger(__name__)
+        self._definitions = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def counter(self, name, help_text):
+        """Declare a counter"""
+        self._definitions[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """Declare a histogram with the given upper bounds"""
+        self._definitions[name] = ('histogram', help_text, tuple(buckets))
+
+    def add_collector(self, collect):
+        """Add a callable returning (name, labels, value) counter samples at publish time"""
+        self._collectors.append(collect)
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram"""
+        buckets = self._definitions[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                # One slot per bucket, one for +Inf, then the sum
+                counts = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-1] += value
+
+    def start(self, flush_interval_seconds=5):
+        """Start publishing this worker's metrics in the background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(flush_interval_seconds)
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Failed to publish metrics: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        self._thread.start()
+
+    def snapshot(self):
+        """This worker's counters and histograms in the on-disk format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                counters[(name, _label_key(labels))] = value
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), counts] for (name, labels), counts in histograms.items()]
+        }
+
+    def flush(self):
+        """Publish this worker's metrics file"""
+        path = os.path.join(self.metrics_dir, f'worker-{os.getpid()}.json')
+        atomic_write(path, json.dumps(self.snapshot()).encode('utf-8'))
+
+    def collect(self):
+        """Merge the metrics of every worker, past and present, into (counters, histograms)"""
+        self.flush()
+        with file_lock(self.lock_path):
+            self._retire_dead_workers()
+            merged = ({}, {})
+            for name in os.listdir(self.metrics_dir):
+                if name == 'retired.json' or (name.startswith('worker-') and name.endswith('.json')):
+                    _merge(merged, _read_snapshot(os.path.join(self.metrics_dir, name)))
+        return merged
+
+    def render(self, gauges=(), collected=None):
+        """Prometheus text exposition of the merged metrics plus (name, help, value) gauges.
+
+        A gauge value may also be a list of (labels, value) pairs. Pass the
+        result of collect() as collected to render the data gauges were
+        computed from instead of merging the worker files again.
+        """
+        counters, histograms = collected if collected is not None else self.collect()
+        lines = []
+        for name in sorted({name for name, _ in counters} | {name for name, _ in histograms}):
+            kind, help_text, buckets = self._definitions.get(name, ('untyped', None, None))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                for (metric, labels), counts in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {counts[-1]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name, help_text, value in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            if isinstance(value, list):
+                for labels, sample in value:
+                    lines.append(f"{name}{_format_labels(_label_key(labels))} {sample}")
+            else:
+                lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def _retire_dead_workers(self):
+        """Fold files of exited workers into retired.json (caller holds the lock)"""
+        dead = []
+        for name in os.listdir(self.metrics_dir):
+            pid = name[len('worker-'):-len('.json')]
+            if name.startswith('worker-') and name.endswith('.json') and pid.isdigit() and not process_alive(int(pid)):
+                dead.append(os.path.join(self.metrics_dir, name))
+        if not dead:
+            return
+        retired = ({}, {})
+        _merge(retired, _read_snapshot(self.retired_path))
+        for path in dead:
+            _merge(retired, _read_snapshot(path))
+        counters, histograms = retired
+        atomic_write(self.retired_path, json.dumps({
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), counts] for (name, labels), counts in histograms.items()]
+        }).encode('utf-8'))
+        for path in dead:
+            os.remove(path)
+
+def _label_key(labels):
+    """Hashable, order-independent form of a label dict"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels):
+    """Render label pairs in Prometheus syntax"""
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+def _read_snapshot(path):
+    """Load one published snapshot, or an empty one"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'counters': [], 'histograms': []}
+
+def _merge(merged, snapshot):
+    """Add a snapshot's samples into (counters, histograms)"""
+    counters, histograms = merged
+    for name, labels, value in snapshot.get('counters', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, counts in snapshot.get('histograms', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        if key in histograms:
+            histograms[key] = [a + b for a, b in zip(histograms[key], counts)]
+        else:
+            histograms[key] = list(counts)
+
+def histogram_quantile(quantile, buckets, counts):
+    """Estimate a quantile from bucket counts, interpolating inside the bucket"""
+    total = sum(counts[:-1])
+    if not total:
+        return None
+    rank = quantile * total
+    seen = 0
+    lower = 0.0
+    for bound, count in zip(buckets, counts):
+        if seen + count >= rank:
+            return lower + (bound - lower) * ((rank - seen) / count if count else 0)
+        seen += count
+        lower = bound
+    # Past the last finite bucket: report its upper bound
+    return buckets[-1]
+
+# Global metrics registry instance
+metrics_registry = None
+
+def get_metrics():
+    """Get the global metrics registry, publishing to runtime/metrics"""
+    global metrics_registry
+    if metrics_registry is None:
+        metrics_registry = MetricsRegistry(os.path.join(RUNTIME_DIR, 'metrics'))
+    return metrics_registry
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+from utils.shared_state import file_lock
+
+class DownloadNotifier:
+    """Coalesces resume-download notifications into periodic digest emails.
+
+    Downloads are appended to a small journal shared by all workers. Repeats of
+    the same (IP, user agent, format) within the dedupe window are dropped, the
+    first download of each day can still be sent immediately, and everything else
+    is flushed as one digest once the oldest event is flush_interval old or the
+    journal reaches flush_max_events.
+    """
+
+    def __init__(self, state_dir, send_immediate, send_digest, mode='digest',
+                 dedupe_window_seconds=1800, flush_interval_seconds=3600,
+                 flush_max_events=20, immediate_first_of_day=True):
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+        self.journal_path = os.path.join(state_dir, 'downloads.jsonl')
+        self.lock_path = os.path.join(state_dir, 'downloads.lock')
+        self.send_immediate = send_immediate
+        self.send_digest = send_digest
+        self.mode = mode
+        self.dedupe_window_seconds = dedupe_window_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_max_events = flush_max_events
+        self.immediate_first_of_day = immediate_first_of_day
+        self.logger = logging.getLogger(__name__)
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, format_type, user_ip, user_agent):
+        """Record one download; returns 'immediate', 'queued' or 'duplicate'"""
+        now = time.time()
+        event = {'ts': now, 'format': format_type, 'ip': user_ip, 'ua': user_agent}
+
+        if self.mode == 'immediate':
+            self.send_immediate(event)
+            return 'immediate'
+
+        # Cheap in-process dedupe; the flush dedupes again across workers
+        key = (user_ip, user_agent, format_type)
+        with self._lock:
+            last_seen = self._seen.get(key)
+            self._seen[key] = now
+            if len(self._seen) > 1000:
+                self._prune_seen(now)
+        if last_seen is not None and now - last_seen < self.dedupe_window_seconds:
+            return 'duplicate'
+
+        if self.immediate_first_of_day and self._claim_first_of_day():
+            self.send_immediate(event)
+            return 'immediate'
+
+        with file_lock(self.lock_path):
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps(event) + '\n')
+            pending = self._read_journal()
+        if len(pending) >= self.flush_max_events:
+            self.flush()
+        return 'queued'
+
+    def flush(self, force=True):
+        """Send buffered downloads as one digest (only if due unless force)"""
+        with file_lock(self.lock_path):
+            events = self._read_journal()
+            if not events:
+                return 0
+            due = events[0]['ts'] + self.flush_interval_seconds <= time.time()
+            if not (force or due or len(events) >= self.flush_max_events):
+                return 0
+            rows = self._coalesce(events)
+            # Keep the journal for the next attempt if the digest could not be queued
+            if not self.send_digest(rows):
+                return 0
+            open(self.journal_path, 'w').close()
+        self.logger.info(f"Resume download digest queued ({len(events)} downloads, {len(rows)} visitors)")
+        return len(events)
+
+    def start(self, check_interval_seconds=60):
+        """Start a thread that flushes the digest when it is due"""
+        if self.mode == 'immediate' or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        def run():
+            while True:
+                time.sleep(min(check_interval_seconds, self.flush_interval_seconds))
+                try:
+                    self.flush(force=False)
+                except Exception as e:
+                    self.logger.error(f"Resume download digest failed: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='download-digest', daemon=True)
+        self._thread.start()
+
+    def _read_journal(self):
+        """Parse the journal (caller holds the lock)"""
+        try:
+            with open(self.journal_path, 'r') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _coalesce(self, events):
+        """Merge repeats of the same visitor and format within the dedupe window"""
+        rows = []
+        latest = {}
+        for event in sorted(events, key=lambda e: e['ts']):
+            key = (event['ip'], event['ua'], event['format'])
+            row = latest.get(key)
+            if row is not None and event['ts'] - row['last_ts'] < self.dedupe_window_seconds:
+                row['count'] += 1
+                row['last_ts'] = event['ts']
+                continue
+            row = dict(event, count=1, last_ts=event['ts'])
+            latest[key] = row
+            rows.append(row)
+        return rows
+
+    def _claim_first_of_day(self):
+        """True for exactly one download per day across all workers"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        marker = os.path.join(self.state_dir, f'first-download-{today}')
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        # Only the newest marker is ever needed
+        for name in os.listdir(self.state_dir):
+            if name.startswith('first-download-') and name != os.path.basename(marker):
+                try:
+                    os.remove(os.path.join(self.state_dir, name))
+                except FileNotFoundError:
+                    continue
+        return True
+
+    def _prune_seen(self, now):
+        """Forget visitors outside the dedupe window (caller holds the lock)"""
+        for key, seen_at in list(self._seen.items()):
+            if now - seen_at >= self.dedupe_window_seconds:
+                del self._seen[key]
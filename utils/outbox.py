@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import logging
+
+from utils.circuit_breaker import CircuitOpenError
+from utils.shared_state import atomic_write, process_alive
+
+class MailOutbox:
+    """Durable on-disk spool for outgoing mail, drained by a background thread.
+
+    Each message is one JSON file in pending/ named after the time it is next due,
+    so finding due messages is a directory listing. Every gunicorn worker runs a
+    drain thread; a worker claims a message by renaming it into processing/, which
+    only one of them can win, so nothing is sent twice.
+    """
+
+    def __init__(self, spool_dir, deliver, max_attempts=8, base_retry_seconds=30,
+                 max_retry_seconds=3600, poll_interval_seconds=5):
+        self.pending_dir = os.path.join(spool_dir, 'pending')
+        self.processing_dir = os.path.join(spool_dir, 'processing')
+        self.failed_dir = os.path.join(spool_dir, 'failed')
+        for directory in (self.pending_dir, self.processing_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.deliver = deliver
+        self.max_attempts = max_attempts
+        self.base_retry_seconds = base_retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.logger = logging.getLogger(__name__)
+        self._wake = threading.Event()
+        self._thread = None
+
+    def enqueue(self, message):
+        """Spool a message dict for delivery and return its id"""
+        message_id = uuid.uuid4().hex
+        record = {'id': message_id, 'attempts': 0, 'queued_at': time.time(), 'message': message}
+        self._write_pending(record, time.time())
+        self._wake.set()
+        return message_id
+
+    def depth(self):
+        """Number of messages waiting to be delivered"""
+        # Skips the .tmp- files atomic_write leaves in pending/ while a message is being written
+        pending = sum(1 for name in os.listdir(self.pending_dir) if name.endswith('.json'))
+        claimed = sum(1 for name in os.listdir(self.processing_dir) if '.json.' in name)
+        return pending + claimed
+
+    def start(self):
+        """Start the background drain thread (once per process)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._recover_abandoned()
+        self._thread = threading.Thread(target=self._run, name='mail-outbox', daemon=True)
+        self._thread.start()
+        self.logger.info("Mail outbox worker started")
+
+    def _run(self):
+        """Deliver due messages until the process exits"""
+        while True:
+            try:
+                self.process_due()
+            except Exception as e:
+                self.logger.error(f"Mail outbox error: {str(e)}")
+            self._wake.wait(self.poll_interval_seconds)
+            self._wake.clear()
+
+    def process_due(self):
+        """Try to deliver every message whose retry time has come"""
+        now_ms = int(time.time() * 1000)
+        for name in sorted(os.listdir(self.pending_dir)):
+            if not name.endswith('.json'):
+                continue
+            # Names sort by due time, so the first future one ends the scan
+            if int(name.split('-', 1)[0]) > now_ms:
+                break
+            claimed = self._claim(name)
+            if claimed is not None and not self._attempt(claimed):
+                # The mail server is down; leave the rest until the breaker lets sends through
+                break
+
+    def _claim(self, name):
+        """Move a pending message into processing/, or None if another worker got it"""
+        claimed = os.path.join(self.processing_dir, f"{name}.{os.getpid()}")
+        try:
+            os.rename(os.path.join(self.pending_dir, name), claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _attempt(self, claimed):
+        """Deliver one claimed message, rescheduling it with backoff on failure.
+
+        Returns False if delivery was skipped because the circuit breaker is open.
+        """
+        try:
+            with open(claimed, 'r') as f:
+                record = json.load(f)
+            if not isinstance(record, dict) or 'id' not in record or 'message' not in record:
+                raise ValueError("record has no id or message")
+        except ValueError as e:
+            # Unreadable: park it in failed/ rather than leave it claimed by this live worker forever
+            name = os.path.basename(claimed).rpartition('.')[0]
+            os.rename(claimed, os.path.join(self.failed_dir, name))
+            self.logger.error(f"Moved corrupt queued mail {name} to failed/: {str(e)}")
+            return True
+
+        try:
+            self.deliver(record['message'])
+            os.remove(claimed)
+            self.logger.info(f"Delivered queued mail {record['id']}")
+            return True
+        except CircuitOpenError as e:
+            # Not an attempt: nothing was sent, so wait out the cool-down without using up retries
+            self._write_pending(record, time.time() + e.retry_after)
+            os.remove(claimed)
+            return False
+        except Exception as e:
+            record['attempts'] += 1
+            record['last_error'] = str(e)
+            self.logger.warning(f"Delivery of mail {record['id']} failed (attempt {record['attempts']}): {str(e)}")
+
+        if record['attempts'] >= self.max_attempts:
+            atomic_write(os.path.join(self.failed_dir, f"{record['id']}.json"),
+                         json.dumps(record).encode('utf-8'))
+            self.logger.error(f"Giving up on mail {record['id']} after {record['attempts']} attempts")
+        else:
+            self._write_pending(record, time.time() + self._retry_delay(record['attempts']))
+        os.remove(claimed)
+        return True
+
+    def _retry_delay(self, attempts):
+        """Exponential backoff with jitter, capped at max_retry_seconds"""
+        delay = min(self.max_retry_seconds, self.base_retry_seconds * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _write_pending(self, record, due_at):
+        """Write a record into pending/ under a name that sorts by due time"""
+        name = f"{int(due_at * 1000):013d}-{record['id']}.json"
+        atomic_write(os.path.join(self.pending_dir, name), json.dumps(record).encode('utf-8'))
+
+    def _recover_abandoned(self):
+        """Return messages claimed by workers that died mid-delivery to pending/"""
+        for name in os.listdir(self.processing_dir):
+            base, _, pid = name.rpartition('.')
+            if pid.isdigit() and not process_alive(int(pid)):
+                try:
+                    os.rename(os.path.join(self.processing_dir, name), os.path.join(self.pending_dir, base))
+                    self.logger.warning(f"Recovered abandoned mail {base}")
+                except FileNotFoundError:
+                    continue
@@ -0,0 +1,190 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import logging
+from datetime import datetime
+
+from werkzeug.exceptions import HTTPException
+
+from utils.shared_state import atomic_write
+
+# Request header that asks for one request to be profiled: "<expires>.<signature>"
+PROFILE_HEADER = 'X-Profile-Token'
+
+def sign_profile_token(secret, ttl_seconds=900):
+    """A profile header value accepted until ttl_seconds from now"""
+    expires = str(int(time.time()) + ttl_seconds)
+    return f"{expires}.{_signature(secret, expires)}"
+
+def verify_profile_token(secret, token):
+    """True if token was signed with secret and has not expired"""
+    expires, _, signature = (token or '').partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(secret, expires))
+
+def _signature(secret, expires):
+    """HMAC of an expiry time"""
+    key = secret.encode('utf-8') if isinstance(secret, str) else secret
+    return hmac.new(key, f"profile:{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+class ProfilingSwitch:
+    """Runtime on/off switch and sample rate for profiling, shared by every worker.
+
+    The state lives in a small JSON file that the admin page rewrites. Each
+    worker re-reads it at most once per check interval, so while profiling is
+    off a request costs one clock read and a comparison.
+    """
+
+    def __init__(self, state_path, enabled=False, sample_rate=0.0, check_interval_seconds=1.0):
+        self.state_path = state_path
+        self.defaults = (enabled, sample_rate)
+        self.check_interval_seconds = check_interval_seconds
+        self._state = self.defaults
+        self._checked_at = None
+
+    def state(self):
+        """Current (enabled, sample_rate)"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval_seconds:
+            self._checked_at = now
+            self._state = self._read()
+        return self._state
+
+    def set(self, enabled, sample_rate):
+        """Switch profiling for every worker"""
+        sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        atomic_write(self.state_path, json.dumps({'enabled': bool(enabled), 'sample_rate': sample_rate}).encode('utf-8'))
+        self._state = (bool(enabled), sample_rate)
+        self._checked_at = time.monotonic()
+
+    def _read(self):
+        """Load the shared state, or the settings.json defaults if it was never set"""
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            return bool(state['enabled']), float(state['sample_rate'])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return self.defaults
+
+class ProfilingMiddleware:
+    """WSGI middleware that runs sampled or explicitly requested requests under cProfile.
+
+    Always installed, but does nothing beyond checking the ProfilingSwitch
+    until an admin turns profiling on. While it is on, a request is profiled
+    with probability sample_rate, or when it carries a valid signed
+    PROFILE_HEADER. Each profile is written as
+    <profile_dir>/<endpoint>/<time>-<pid>.pstats, keeping the newest
+    max_files_per_endpoint files per endpoint.
+    """
+
+    def __init__(self, wsgi_app, url_map, profile_dir, secret, switch, max_files_per_endpoint=20):
+        os.makedirs(profile_dir, exist_ok=True)
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+        self.profile_dir = profile_dir
+        self.secret = secret
+        self.switch = switch
+        self.max_files_per_endpoint = max_files_per_endpoint
+        self.logger = logging.getLogger(__name__)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        enabled, sample_rate = self.switch.state()
+        if not enabled:
+            return self.wsgi_app(environ, start_response)
+
+        requested = environ.get('HTTP_' + PROFILE_HEADER.upper().replace('-', '_'))
+        if requested is not None:
+            if not verify_profile_token(self.secret, requested):
+                self.logger.warning(f"Ignoring invalid profile token from {environ.get('REMOTE_ADDR')}")
+                requested = None
+        if requested is None and (sample_rate <= 0 or random.random() >= sample_rate):
+            return self.wsgi_app(environ, start_response)
+
+        profiler = cProfile.Profile()
+        started = time.monotonic()
+        # Flask builds the whole response (apart from file streams) inside this call
+        response = profiler.runcall(self.wsgi_app, environ, start_response)
+        try:
+            self._save(profiler, environ, time.monotonic() - started)
+        except Exception as e:
+            self.logger.error(f"Failed to save request profile: {str(e)}")
+        return response
+
+    def _save(self, profiler, environ, elapsed):
+        """Write one profile and rotate the endpoint's directory"""
+        endpoint = self._endpoint(environ)
+        endpoint_dir = os.path.join(self.profile_dir, endpoint)
+        os.makedirs(endpoint_dir, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}.pstats"
+        profiler.dump_stats(os.path.join(endpoint_dir, name))
+        self.logger.info(f"Profiled {environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')} "
+                         f"({endpoint}, {elapsed * 1000:.1f} ms) -> {name}")
+
+        profiles = sorted(name for name in os.listdir(endpoint_dir) if name.endswith('.pstats'))
+        for old in profiles[:-self.max_files_per_endpoint]:
+            try:
+                os.remove(os.path.join(endpoint_dir, old))
+            except FileNotFoundError:
+                continue
+
+    def _endpoint(self, environ):
+        """Flask endpoint name the request routed to"""
+        try:
+            endpoint, _ = self.url_map.bind_to_environ(environ).match()
+            return endpoint
+        except HTTPException:
+            return 'unmatched'
+
+def profile_summary(profile_dir, endpoint=None, limit=30):
+    """Top functions by cumulative time across stored profiles.
+
+    Returns {'endpoints': {endpoint: profile count}, 'profiles': n,
+    'functions': [...]} for one endpoint or all of them.
+    """
+    endpoints = {}
+    paths = []
+    if os.path.isdir(profile_dir):
+        for name in sorted(os.listdir(profile_dir)):
+            endpoint_dir = os.path.join(profile_dir, name)
+            if not os.path.isdir(endpoint_dir):
+                continue
+            files = [os.path.join(endpoint_dir, f) for f in sorted(os.listdir(endpoint_dir)) if f.endswith('.pstats')]
+            endpoints[name] = len(files)
+            if endpoint is None or endpoint == name:
+                paths.extend(files)
+
+    stats = None
+    for path in paths:
+        try:
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+        except (OSError, EOFError, TypeError, ValueError):
+            # Rotated away or still being written by another worker
+            continue
+
+    functions = []
+    if stats is not None:
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        for (filename, line, function), (_, calls, total, cumulative, _) in rows[:limit]:
+            functions.append({
+                'function': function,
+                'location': f"{os.path.basename(filename)}:{line}" if line else filename,
+                'calls': calls,
+                'total_ms': round(total * 1000 / len(paths), 2),
+                'cumulative_ms': round(cumulative * 1000 / len(paths), 2)
+            })
+    return {'endpoints': endpoints, 'profiles': len(paths), 'functions': functions}
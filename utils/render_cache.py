@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from utils.compression import compress
+
+class RenderedPage:
+    """Encoded output of one render, plus compressed variants built on demand"""
+
+    __slots__ = ('body', 'variants', 'rendered_at', '_lock')
+
+    def __init__(self, body):
+        self.body = body
+        self.variants = {}
+        self.rendered_at = time.time()
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """Return the body compressed with encoding, compressing at most once"""
+        variant = self.variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self.variants.get(encoding)
+                if variant is None:
+                    variant = compress(self.body, encoding)
+                    self.variants[encoding] = variant
+        return variant
+
+class RenderCache:
+    """Bounded LRU of rendered pages keyed by the versions they were built from.
+
+    Renders are single-flighted: concurrent misses on the same key wait for the
+    first thread's render instead of rendering the page again. Each page records
+    the data files it depends on, so a change to one file evicts only the pages
+    built from it.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._depends_on = {}
+        self._dependents = defaultdict(set)
+
+    def get(self, key):
+        """Return the cached page for key, or None"""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+            return page
+
+    def get_or_render(self, key, render, depends_on=()):
+        """Return (page, hit) for key, calling render() for the body on a miss"""
+        page = self.get(key)
+        if page is not None:
+            return page, True
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished the render while we waited
+            page = self.get(key)
+            if page is not None:
+                return page, True
+            try:
+                body = render()
+                page = RenderedPage(body.encode('utf-8') if isinstance(body, str) else body)
+                with self._lock:
+                    self._entries[key] = page
+                    self._depends_on[key] = tuple(depends_on)
+                    for dependency in depends_on:
+                        self._dependents[dependency].add(key)
+                    while len(self._entries) > self.max_entries:
+                        self._evict(next(iter(self._entries)))
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return page, False
+
+    def invalidate(self, dependency):
+        """Drop every page that depends on dependency, returning how many were dropped"""
+        with self._lock:
+            keys = list(self._dependents.get(dependency, ()))
+            for key in keys:
+                self._evict(key)
+            return len(keys)
+
+    def _evict(self, key):
+        """Remove key and its dependency edges (caller holds the lock)"""
+        self._entries.pop(key, None)
+        for dependency in self._depends_on.pop(key, ()):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def __len__(self):
+        """Number of cached pages"""
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Drop every cached page"""
+        with self._lock:
+            self._entries.clear()
+            self._depends_on.clear()
+            self._dependents.clear()
@@ -2,16 +2,16 @@ import os
 import secrets
 import string
 import hashlib
-import smtplib
 import json
 import logging
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import threading
 import schedule
 import time
 
+from utils.smtp_pool import get_smtp_pool
+from utils.email_templates import get_email_templates, build_mime_message
+
 class SecurityManager:
     def __init__(self, settings_file='settings.json'):
         self.app_dir = os.path.dirname(os.path.dirname(__file__))
@@ -59,34 +59,18 @@ class SecurityManager:
                 self.logger.error("Email credentials not found in environment variables")
                 return False
             
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = sender_email
-            message["To"] = recipient_email
-            message["Subject"] = "Portfolio Admin - New Temporary Password"
-            
-            # Email body
-            body = f"""
-            <html>
-            <body>
-                <h2>Portfolio Admin Access</h2>
-                <p>Your new temporary admin password has been generated:</p>
-                <p><strong style="font-size: 18px; color: #007bff;">{password}</strong></p>
-                <p>This password will expire in {self.settings['security']['password_reset_interval_minutes']} minutes.</p>
-                <p>Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                <hr>
-                <p><em>This is an automated message from your Portfolio Admin System.</em></p>
-            </body>
-            </html>
-            """
+            # Render the compiled email template into a MIME message
+            body = get_email_templates().render(
+                'password',
+                password=password,
+                expires_minutes=self.settings['security']['password_reset_interval_minutes'],
+                generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
+            message = build_mime_message(sender_email, recipient_email,
+                                         "Portfolio Admin - New Temporary Password", body)
             
-            message.attach(MIMEText(body, "html"))
-            
-            # Send email
-            with smtplib.SMTP("smtp.gmail.com", 587) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.sendmail(sender_email, recipient_email, message.as_string())
+            # Send email over the shared SMTP connection pool
+            get_smtp_pool().sendmail(sender_email, recipient_email, message.as_string())
             
             self.logger.info("Password email sent successfully")
             return True
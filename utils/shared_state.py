@@ -0,0 +1,65 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development machines run a single process, so locking is a no-op there
+    fcntl = None
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Directory shared by every gunicorn worker on the dyno
+RUNTIME_DIR = os.getenv('PORTFOLIO_RUNTIME_DIR', os.path.join(APP_DIR, 'runtime'))
+
+def runtime_path(*parts):
+    """Return a path inside the shared runtime directory, creating its parent directory"""
+    path = os.path.join(RUNTIME_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on path for the duration of the block (across processes)"""
+    with open(path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield lock_file
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def atomic_write(path, data):
+    """Write bytes to path so readers only ever see the old or the new content"""
+    directory = os.path.dirname(path) or '.'
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def process_alive(pid):
+    """True if a process with this pid exists"""
+    # os.kill would terminate the process on Windows, so assume it is alive there
+    if pid == os.getpid() or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,191 @@
+import json
+import os
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+
+from utils.shared_state import APP_DIR, atomic_write
+
+class SlowRequestWatchdog:
+    """Samples the stacks of requests that run longer than a threshold.
+
+    Request threads register themselves in begin() and leave in end(). A
+    watchdog thread wakes every sample interval and, for each request past
+    the threshold, reads its thread's current frame from sys._current_frames()
+    into a histogram of stacks. The report is written when a request first
+    turns slow, refreshed while it keeps running and finalised when it ends,
+    so a request that hangs forever still leaves a report behind.
+    """
+
+    def __init__(self, report_dir, threshold_seconds=2.0, sample_interval_seconds=0.25,
+                 max_samples=200, report_interval_seconds=5.0, max_reports=100, max_depth=30):
+        os.makedirs(report_dir, exist_ok=True)
+        self.report_dir = report_dir
+        self.threshold_seconds = threshold_seconds
+        self.sample_interval_seconds = sample_interval_seconds
+        self.max_samples = max_samples
+        self.report_interval_seconds = report_interval_seconds
+        self.max_reports = max_reports
+        self.max_depth = max_depth
+        self.logger = logging.getLogger(__name__)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, endpoint, method, path):
+        """Register the calling thread's request"""
+        with self._lock:
+            self._active[threading.get_ident()] = {
+                'endpoint': endpoint or 'unmatched',
+                'method': method,
+                'path': path,
+                'started': time.monotonic(),
+                'started_at': datetime.now().isoformat(timespec='milliseconds'),
+                'stacks': Counter(),
+                'samples': 0,
+                'reported': None,
+                # Serialises this request's report writes; finalised once end() wrote the last one
+                'write_lock': threading.Lock(),
+                'finalised': False
+            }
+
+    def end(self):
+        """Unregister the calling thread's request, finalising its report if it was slow"""
+        with self._lock:
+            entry = self._active.pop(threading.get_ident(), None)
+        if entry is None:
+            return
+        with entry['write_lock']:
+            entry['finalised'] = True
+            if entry['reported'] is None:
+                return
+            with self._lock:
+                snapshot = self._snapshot(entry)
+            try:
+                self._write(threading.get_ident(), snapshot, finished=True)
+            except Exception as e:
+                self.logger.error(f"Failed to write slow request report: {str(e)}")
+
+    def start(self):
+        """Watch registered requests in the background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sample_interval_seconds)
+                try:
+                    self.check()
+                except Exception as e:
+                    self.logger.error(f"Slow request watchdog failed: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='slow-request-watchdog', daemon=True)
+        self._thread.start()
+
+    def check(self):
+        """Sample every request past the threshold and write due reports"""
+        now = time.monotonic()
+        due = []
+        # Only sampling happens under the lock; begin() and end() never wait on report I/O
+        with self._lock:
+            slow = [(ident, entry) for ident, entry in self._active.items()
+                    if now - entry['started'] >= self.threshold_seconds]
+            if not slow:
+                return
+
+            frames = sys._current_frames()
+            for ident, entry in slow:
+                frame = frames.get(ident)
+                if frame is not None and entry['samples'] < self.max_samples:
+                    entry['stacks'][self._stack(frame)] += 1
+                    entry['samples'] += 1
+                if entry['reported'] is None:
+                    self.logger.warning(f"Slow request: {entry['method']} {entry['path']} ({entry['endpoint']}) "
+                                        f"running for {now - entry['started']:.1f}s")
+                if entry['reported'] is None or now - entry['reported'] >= self.report_interval_seconds:
+                    entry['reported'] = now
+                    due.append((ident, entry, self._snapshot(entry)))
+            # Drop our references to other threads' frames promptly
+            del frames, frame
+
+        for ident, entry, snapshot in due:
+            with entry['write_lock']:
+                # The request ended meanwhile and its finished report must not be overwritten
+                if entry['finalised']:
+                    continue
+                try:
+                    self._write(ident, snapshot, finished=False)
+                except Exception as e:
+                    self.logger.error(f"Failed to write slow request report: {str(e)}")
+
+    def recent(self, limit=20):
+        """The newest reports, newest first"""
+        reports = []
+        for name in sorted(self._report_names(), reverse=True)[:limit]:
+            try:
+                with open(os.path.join(self.report_dir, name), 'r') as f:
+                    reports.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return reports
+
+    def _stack(self, frame):
+        """Compact innermost-last stack of one frame as a tuple of 'file:line function'"""
+        entries = []
+        while frame is not None and len(entries) < self.max_depth:
+            code = frame.f_code
+            entries.append(f"{_short_path(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+            frame = frame.f_back
+        return tuple(reversed(entries))
+
+    def _snapshot(self, entry):
+        """Copy of the parts of an entry a report needs, taken under the lock"""
+        return {
+            'endpoint': entry['endpoint'],
+            'method': entry['method'],
+            'path': entry['path'],
+            'started': entry['started'],
+            'started_at': entry['started_at'],
+            'stacks': Counter(entry['stacks']),
+            'samples': entry['samples']
+        }
+
+    def _write(self, ident, entry, finished):
+        """Write (or rewrite) one request's report and rotate old ones"""
+        stacks = sorted(entry['stacks'].items(), key=lambda item: item[1], reverse=True)
+        report = {
+            'endpoint': entry['endpoint'],
+            'method': entry['method'],
+            'path': entry['path'],
+            'started_at': entry['started_at'],
+            'elapsed_seconds': round(time.monotonic() - entry['started'], 3),
+            'status': 'finished' if finished else 'running',
+            'pid': os.getpid(),
+            'samples': entry['samples'],
+            'sample_interval_seconds': self.sample_interval_seconds,
+            'stacks': [{'count': count, 'frames': list(frames)} for frames, count in stacks[:10]]
+        }
+        name = f"{entry['started_at'].replace(':', '').replace('-', '')}-{os.getpid()}-{ident}.json"
+        atomic_write(os.path.join(self.report_dir, name), json.dumps(report, indent=1).encode('utf-8'))
+
+        for old in sorted(self._report_names())[:-self.max_reports]:
+            try:
+                os.remove(os.path.join(self.report_dir, old))
+            except FileNotFoundError:
+                continue
+
+    def _report_names(self):
+        """File names of stored reports"""
+        return [name for name in os.listdir(self.report_dir) if name.endswith('.json') and name[:1].isdigit()]
+
+def _short_path(filename):
+    """Source path relative to the app or to site-packages"""
+    if filename.startswith(APP_DIR + os.sep):
+        return os.path.relpath(filename, APP_DIR)
+    marker = os.sep + 'site-packages' + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
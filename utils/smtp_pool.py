@@ -0,0 +1,195 @@
+import json
+import os
+import smtplib
+import threading
+import time
+import logging
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import get_metrics
+
+class _PooledConnection:
+    """An authenticated SMTP connection plus its usage bookkeeping"""
+
+    __slots__ = ('smtp', 'created_at', 'last_used', 'sent')
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.sent = 0
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open between sends.
+
+    A burst of messages reuses one STARTTLS + login handshake. Connections idle
+    for a while are checked with NOOP before reuse, connections idle for too long
+    are dropped, and each connection is recycled after a fixed number of messages.
+    Every socket operation is bounded by timeout, and a circuit breaker makes
+    sends fail fast while the server keeps failing.
+    """
+
+    def __init__(self, host, port, username, password, use_tls=True, max_connections=2,
+                 max_idle_seconds=60, noop_after_seconds=10, max_messages_per_connection=50,
+                 timeout=10, breaker=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_idle_seconds = max_idle_seconds
+        self.noop_after_seconds = noop_after_seconds
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker('SMTP')
+        self.metrics = get_metrics()
+        self.metrics.histogram('portfolio_smtp_send_seconds', 'Time to hand one message to the SMTP server.')
+        self.metrics.counter('portfolio_smtp_rejected_total', 'Sends rejected without trying because the SMTP circuit was open.')
+        self.logger = logging.getLogger(__name__)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def sendmail(self, from_addr, to_addrs, message):
+        """Send one message over a pooled connection (raises CircuitOpenError while the breaker is open)"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.metrics.inc('portfolio_smtp_rejected_total')
+            raise
+        started = time.monotonic()
+        try:
+            self._send(from_addr, to_addrs, message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # The server answered, so this is a bad message rather than an outage
+            self.breaker.record_success()
+            self.metrics.observe('portfolio_smtp_send_seconds', time.monotonic() - started, outcome='refused')
+            raise
+        except Exception as e:
+            self.breaker.record_failure(e)
+            self.metrics.observe('portfolio_smtp_send_seconds', time.monotonic() - started, outcome='error')
+            raise
+        self.breaker.record_success()
+        self.metrics.observe('portfolio_smtp_send_seconds', time.monotonic() - started, outcome='sent')
+
+    def _send(self, from_addr, to_addrs, message):
+        """Send over an idle or new connection, retrying once if it was dropped"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for a free SMTP connection")
+        try:
+            connection = self._acquire()
+            try:
+                connection.smtp.sendmail(from_addr, to_addrs, message)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped a connection that looked healthy; retry once on a fresh one
+                self._close(connection)
+                connection = self._connect()
+                try:
+                    connection.smtp.sendmail(from_addr, to_addrs, message)
+                except Exception:
+                    self._close(connection)
+                    raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # The session is still usable after the server refused this message
+                self._release(connection)
+                raise
+            except Exception:
+                self._close(connection)
+                raise
+
+            connection.sent += 1
+            self._release(connection)
+        finally:
+            self._slots.release()
+
+    def _acquire(self):
+        """Return a healthy idle connection, or open a new one"""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.max_idle_seconds:
+                self._close(connection)
+                continue
+            if idle_for > self.noop_after_seconds and not self._is_alive(connection):
+                self._close(connection)
+                continue
+            return connection
+
+    def _release(self, connection):
+        """Return a connection to the pool, or recycle it once it has sent enough"""
+        if connection.sent >= self.max_messages_per_connection:
+            self._close(connection)
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP connection"""
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.logger.info(f"Opened SMTP connection to {self.host}:{self.port}")
+        return _PooledConnection(smtp)
+
+    def _is_alive(self, connection):
+        """Health check an idle connection with NOOP"""
+        try:
+            return connection.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        """Politely close a connection, ignoring errors from dead sockets"""
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+# Global SMTP pool instance
+smtp_pool = None
+
+def get_smtp_pool():
+    """Get the global SMTP pool, configured from settings.json and the Gmail env vars"""
+    global smtp_pool
+    if smtp_pool is None:
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(app_dir, 'settings.json'), 'r') as f:
+            email_settings = json.load(f).get('email', {})
+        pool_settings = email_settings.get('pool', {})
+        breaker_settings = email_settings.get('circuit_breaker', {})
+        smtp_pool = SMTPConnectionPool(
+            email_settings.get('smtp_server', 'smtp.gmail.com'),
+            email_settings.get('smtp_port', 587),
+            os.getenv('GMAIL_USERNAME'),
+            os.getenv('GMAIL_APP_PASSWORD'),
+            use_tls=email_settings.get('use_tls', True),
+            max_connections=pool_settings.get('max_connections', 2),
+            max_idle_seconds=pool_settings.get('max_idle_seconds', 60),
+            noop_after_seconds=pool_settings.get('noop_after_seconds', 10),
+            max_messages_per_connection=pool_settings.get('max_messages_per_connection', 50),
+            timeout=email_settings.get('timeout_seconds', 10),
+            breaker=CircuitBreaker(
+                'SMTP',
+                failure_threshold=breaker_settings.get('failure_threshold', 3),
+                reset_timeout_seconds=breaker_settings.get('reset_timeout_seconds', 60)
+            )
+        )
+    return smtp_pool
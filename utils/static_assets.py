@@ -0,0 +1,80 @@
+import json
+import logging
+import mimetypes
+import os
+import re
+
+from flask import send_file, send_from_directory
+from werkzeug.security import safe_join
+
+from utils.compression import SUFFIXES, COMPRESSIBLE_EXTENSIONS, negotiate_encoding
+
+# Written by build_assets.py into the static directory
+MANIFEST_NAME = 'asset-manifest.json'
+
+FINGERPRINT_EXTENSIONS = ('.css', '.js')
+
+# The service worker must keep a stable URL, or browsers would register a new one per deploy
+FINGERPRINT_EXCLUDE = ('js/sw.js',)
+
+# Matches the content hash build_assets.py inserts before the extension
+FINGERPRINTED_NAME = re.compile(r'\.[0-9a-f]{10}\.(css|js)(\.gz|\.br)?$')
+
+def load_asset_manifest(static_dir):
+    """Load logical name -> fingerprinted name, skipping entries older than their source"""
+    logger = logging.getLogger(__name__)
+    try:
+        with open(os.path.join(static_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logger.info("No asset manifest found, serving static files by their plain names")
+        return {}
+    except json.JSONDecodeError:
+        logger.error("Invalid asset manifest, serving static files by their plain names")
+        return {}
+
+    # A source edited after the last build (local development) must not resolve to a stale copy
+    current = {}
+    for logical, hashed in manifest.items():
+        try:
+            if os.stat(os.path.join(static_dir, hashed)).st_mtime_ns >= os.stat(os.path.join(static_dir, logical)).st_mtime_ns:
+                current[logical] = hashed
+        except OSError:
+            continue
+    return current
+
+def precompressed_variant(static_dir, filename, request):
+    """Return (encoding, path) of the best usable precompressed file, or (None, None)"""
+    source = safe_join(static_dir, filename)
+    if source is None or not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+        return None, None
+
+    # Only offer encodings whose file exists and was built from the current source
+    try:
+        source_mtime = os.stat(source).st_mtime_ns
+    except OSError:
+        return None, None
+    usable = {}
+    for encoding, suffix in SUFFIXES.items():
+        try:
+            if os.stat(source + suffix).st_mtime_ns >= source_mtime:
+                usable[encoding] = source + suffix
+        except OSError:
+            continue
+
+    encoding = negotiate_encoding(request, tuple(usable)) if usable else None
+    return encoding, usable.get(encoding)
+
+def send_static_asset(static_dir, filename, request):
+    """Serve a static file, preferring a precompressed variant the client accepts"""
+    encoding, variant_path = precompressed_variant(static_dir, filename, request)
+    if encoding is None:
+        response = send_from_directory(static_dir, filename)
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(variant_path, mimetype=mimetype, conditional=True)
+        response.headers['Content-Encoding'] = encoding
+
+    if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,135 @@
+import gc
+import json
+import os
+import threading
+import time
+import logging
+from collections import deque
+
+from utils.shared_state import atomic_write, process_alive
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+class SystemSampler:
+    """Per-worker process samples in a fixed-size ring buffer.
+
+    A background thread samples RSS, CPU, open file descriptors, threads and
+    garbage collector counters every few seconds and publishes this worker's
+    buffer as worker-<pid>.json. Requests only read those files, so psutil is
+    never called on the request path and every worker's history is visible
+    from whichever worker serves the dashboard.
+    """
+
+    def __init__(self, samples_dir, ring_size=240):
+        os.makedirs(samples_dir, exist_ok=True)
+        self.samples_dir = samples_dir
+        self.ring_size = ring_size
+        self.logger = logging.getLogger(__name__)
+        self._samples = deque(maxlen=ring_size)
+        self._process = None
+        self._process_pid = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, interval_seconds=15):
+        """Sample this worker periodically in the background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not PSUTIL_AVAILABLE:
+            self.logger.warning("psutil is not installed; system samples will only include threads and GC stats")
+
+        def run():
+            while True:
+                try:
+                    self.sample()
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Failed to sample system metrics: {str(e)}")
+                time.sleep(interval_seconds)
+
+        self._thread = threading.Thread(target=run, name='system-sampler', daemon=True)
+        self._thread.start()
+
+    def sample(self):
+        """Take one sample of this worker and add it to the ring buffer"""
+        sample = {
+            'ts': time.time(),
+            'rss_bytes': None,
+            'cpu_percent': None,
+            'open_fds': None,
+            'threads': threading.active_count(),
+            'gc_counts': list(gc.get_count()),
+            'gc_collections': [generation['collections'] for generation in gc.get_stats()],
+            'gc_objects': len(gc.get_objects())
+        }
+        if PSUTIL_AVAILABLE:
+            process = self._current_process()
+            with process.oneshot():
+                sample['rss_bytes'] = process.memory_info().rss
+                # Percent of one core since the previous sample (0.0 the first time)
+                sample['cpu_percent'] = process.cpu_percent(interval=None)
+                sample['threads'] = process.num_threads()
+                sample['open_fds'] = process.num_fds() if hasattr(process, 'num_fds') else process.num_handles()
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def flush(self):
+        """Publish this worker's ring buffer"""
+        with self._lock:
+            samples = list(self._samples)
+        path = os.path.join(self.samples_dir, f'worker-{os.getpid()}.json')
+        atomic_write(path, json.dumps({'pid': os.getpid(), 'samples': samples}).encode('utf-8'))
+
+    def workers(self):
+        """Published buffers of every live worker: [{'pid', 'latest', 'samples', 'rss_growth_bytes'}]"""
+        workers = []
+        for name in sorted(os.listdir(self.samples_dir)):
+            pid = name[len('worker-'):-len('.json')]
+            if not (name.startswith('worker-') and name.endswith('.json') and pid.isdigit()):
+                continue
+            path = os.path.join(self.samples_dir, name)
+            if not process_alive(int(pid)):
+                # Workers recycled by gunicorn leave their last buffer behind
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(path, 'r') as f:
+                    samples = json.load(f)['samples']
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                continue
+            if not samples:
+                continue
+            rss = [sample['rss_bytes'] for sample in samples if sample['rss_bytes'] is not None]
+            workers.append({
+                'pid': int(pid),
+                'latest': samples[-1],
+                'samples': samples,
+                'rss_growth_bytes': rss[-1] - rss[0] if rss else None
+            })
+        return workers
+
+    def _current_process(self):
+        """psutil handle for this process, recreated after a fork"""
+        if self._process_pid != os.getpid():
+            self._process = psutil.Process()
+            self._process_pid = os.getpid()
+        return self._process
+
+def format_bytes(value):
+    """Human-readable byte count for the dashboard"""
+    if value is None:
+        return 'N/A'
+    for unit in ('B', 'KB', 'MB'):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from utils.shared_state import atomic_write, file_lock
+
+# Key for the site-wide sketch of each day
+ALL_PATHS = '*'
+
+class HyperLogLog:
+    """Distinct-count sketch in a fixed 2**precision byte array (about 3% error at p=10)"""
+
+    def __init__(self, precision=10, registers=None):
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    def add(self, value):
+        """Add a str or bytes value"""
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        hashed = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """Estimated number of distinct values added"""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * size and empty:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = size * math.log(size / empty)
+        return round(estimate)
+
+    def encode(self):
+        """Registers as base64 text for the JSON store"""
+        return base64.b64encode(bytes(self.registers)).decode('ascii')
+
+    @classmethod
+    def decode(cls, text, precision=10):
+        """Rebuild a sketch written by encode()"""
+        return cls(precision, base64.b64decode(text))
+
+class VisitorCounter:
+    """Live page views and unique visitors per (day, path).
+
+    Recording a view only touches in-memory counters and sketches. A background
+    thread merges each worker's buffer into one JSON file per day under a lock
+    and starts a fresh buffer, so the disk sees a handful of writes per flush
+    interval however busy the site is.
+    """
+
+    def __init__(self, store_dir, precision=10, retention_days=90):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.precision = precision
+        self.retention_days = retention_days
+        self.logger = logging.getLogger(__name__)
+        self._views = Counter()
+        self._sketches = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, path, visitor_id):
+        """Count one page view of path by an (already pseudonymous) visitor id"""
+        day = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            for key in ((day, path), (day, ALL_PATHS)):
+                self._views[key] += 1
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = self._sketches[key] = HyperLogLog(self.precision)
+                sketch.add(visitor_id)
+
+    def start(self, flush_interval_seconds=10):
+        """Merge this worker's buffer into the store periodically"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(flush_interval_seconds)
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Failed to flush visitor stats: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name='visitor-stats', daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        """Merge buffered views and sketches into the per-day files"""
+        with self._lock:
+            views, self._views = self._views, Counter()
+            sketches, self._sketches = self._sketches, {}
+        if not views:
+            return
+
+        for day in sorted({day for day, _ in views}):
+            with file_lock(self._day_path(day) + '.lock'):
+                stored = self._read_day(day)
+                for (view_day, path), count in views.items():
+                    if view_day != day:
+                        continue
+                    entry = stored.setdefault(path, {'views': 0, 'sketch': None})
+                    entry['views'] += count
+                    sketch = sketches[(day, path)]
+                    if entry['sketch']:
+                        sketch.merge(HyperLogLog.decode(entry['sketch'], self.precision))
+                    entry['sketch'] = sketch.encode()
+                atomic_write(self._day_path(day), json.dumps(stored, separators=(',', ':')).encode('utf-8'))
+        self._prune()
+
+    def stats(self, days=7, top_paths=5):
+        """Views and unique visitors for recent days, the whole window and today's top paths"""
+        self.flush()
+        today = datetime.now().date()
+        daily = []
+        window = HyperLogLog(self.precision)
+        window_views = 0
+        today_paths = {}
+        for offset in range(days - 1, -1, -1):
+            day = (today - timedelta(days=offset)).strftime('%Y-%m-%d')
+            stored = self._read_day(day)
+            site = stored.get(ALL_PATHS)
+            sketch = HyperLogLog.decode(site['sketch'], self.precision) if site else HyperLogLog(self.precision)
+            window.merge(sketch)
+            window_views += site['views'] if site else 0
+            daily.append({'day': day, 'views': site['views'] if site else 0, 'visitors': sketch.count()})
+            if offset == 0:
+                today_paths = stored
+
+        paths = [
+            {'path': path, 'views': entry['views'],
+             'visitors': HyperLogLog.decode(entry['sketch'], self.precision).count()}
+            for path, entry in today_paths.items() if path != ALL_PATHS
+        ]
+        paths.sort(key=lambda item: item['views'], reverse=True)
+        return {
+            'today': daily[-1],
+            'days': daily,
+            'window': {'days': days, 'views': window_views, 'visitors': window.count()},
+            'top_paths_today': paths[:top_paths]
+        }
+
+    def _day_path(self, day):
+        """Store file for one day"""
+        return os.path.join(self.store_dir, f'{day}.json')
+
+    def _read_day(self, day):
+        """Load one day's {path: {'views', 'sketch'}}, or {} if nothing was stored"""
+        try:
+            with open(self._day_path(day), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _prune(self):
+        """Delete days past retention"""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        for name in os.listdir(self.store_dir):
+            if name[:1].isdigit() and name[:10] < cutoff:
+                try:
+                    os.remove(os.path.join(self.store_dir, name))
+                except FileNotFoundError:
+                    continue